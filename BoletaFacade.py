@@ -1,25 +1,223 @@
 from fpdf import FPDF
 from datetime import datetime
+import threading
+import textwrap
+
+# "Arial" es solo un alias de Helvetica en las fuentes base de FPDF
+_FUENTE = "Helvetica"
+
+
+def _asegurar_espacio(pdf, y, alto):
+    # text() y rect() no hacen salto de página automático como cell()
+    if y + alto > pdf.page_break_trigger:
+        pdf.add_page()
+        return pdf.t_margin
+    return y
+
+
+def _salida_pdf(pdf, pdf_filename, como_bytes):
+    if como_bytes:
+        return bytes(pdf.output())
+    pdf.output(pdf_filename)
+    return pdf_filename
+
+
+# columnas de texto de una impresora térmica de 80 mm con la fuente A
+ANCHO_TICKET = 48
+
+_ESC_INICIAR = b"\x1b@"
+_ESC_CODEPAGE_PC850 = b"\x1bt\x02"
+_ESC_NEGRITA = b"\x1bE\x01"
+_ESC_SIN_NEGRITA = b"\x1bE\x00"
+_ESC_CENTRAR = b"\x1ba\x01"
+_ESC_IZQUIERDA = b"\x1ba\x00"
+_ESC_DOBLE = b"\x1d!\x11"
+_ESC_NORMAL = b"\x1d!\x00"
+_ESC_AVANZAR_Y_CORTAR = b"\x1bd\x04\x1dV\x42\x00"
+
+
+class _PlantillaBoleta:
+    """Partes fijas de la boleta (encabezado, títulos de la tabla, etiquetas de totales y pie).
+
+    Las posiciones y anchos de cada texto se calculan una sola vez por proceso;
+    en cada boleta solo se ubican textos y rectángulos ya medidos, sin pasar
+    por cell(), que es lo más caro de FPDF.
+    """
+
+    ALTO_FILA = 10
+    ENCABEZADO = (
+        ('B', 16, "Boleta Restaurante"),
+        ('', 12, "Razón Social del Negocio"),
+        ('', 12, "RUT: 12345678-9"),
+        ('', 12, "Dirección: Calle Falsa 123"),
+        ('', 12, "Teléfono: +56 9 4733 7031"),
+    )
+    COLUMNAS = ((70, "Nombre"), (20, "Cantidad"), (35, "Precio Unitario"), (30, "Subtotal"))
+    ETIQUETAS_TOTALES = ("Subtotal:", "IVA (19%):", "Total:")
+    ANCHO_ETIQUETA_TOTAL = 120
+    ANCHO_VALOR_TOTAL = 30
+    PIE = (
+        "Gracias por su compra. Para cualquier consulta, llámenos al +56 9 777 5678.",
+        "Los productos adquiridos no tienen garantía.",
+    )
+
+    _instancia = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls) -> "_PlantillaBoleta":
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = cls()
+        return cls._instancia
+
+    def __init__(self):
+        pdf = FPDF()
+        pdf.add_page()
+        self._pdf = pdf
+        self.ancho_util = ancho_util = pdf.w - pdf.l_margin - pdf.r_margin
+        self.c_margin = pdf.c_margin
+        alto = self.ALTO_FILA
+        self._desplazamiento_texto = {
+            tamano: 0.5 * alto + 0.3 * (tamano / pdf.k) for tamano in (10, 12, 16)
+        }
+
+        self.encabezado = [
+            self._texto(estilo, tamano, 0, i * alto, ancho_util, texto, 'L')
+            for i, (estilo, tamano, texto) in enumerate(self.ENCABEZADO)
+        ]
+        self.alto_encabezado = len(self.ENCABEZADO) * alto
+
+        self.titulos_tabla = []
+        x = 0
+        for ancho, titulo in self.COLUMNAS:
+            self.titulos_tabla.append(('rect', x, 0, ancho, alto))
+            self.titulos_tabla.append(self._texto('B', 12, x, 0, ancho, titulo, 'L'))
+            x += ancho
+
+        self.etiquetas_totales = [
+            self._texto('B', 12, 0, i * alto, self.ANCHO_ETIQUETA_TOTAL, etiqueta, 'R')
+            for i, etiqueta in enumerate(self.ETIQUETAS_TOTALES)
+        ]
+        self.pie = [
+            self._texto('I', 10, 0, i * alto, ancho_util, texto, 'C')
+            for i, texto in enumerate(self.PIE)
+        ]
+        del self._pdf
+
+    def _texto(self, estilo, tamano, x, y, ancho, texto, align):
+        # misma ubicación que le da FPDF.cell() al texto dentro de la celda
+        pdf = self._pdf
+        pdf.set_font(_FUENTE, estilo, tamano)
+        ancho_texto = pdf.get_string_width(texto)
+        if align == 'R':
+            dx = x + ancho - pdf.c_margin - ancho_texto
+        elif align == 'C':
+            dx = x + (ancho - ancho_texto) / 2
+        else:
+            dx = x + pdf.c_margin
+        dy = y + self._desplazamiento_texto[tamano]
+        return ('texto', estilo, tamano, dx, dy, texto)
+
+    def texto_derecha(self, pdf, x, y, ancho, texto):
+        """Texto alineado a la derecha en una celda sin borde, con la fuente actual."""
+        dx = ancho - self.c_margin - pdf.get_string_width(texto)
+        pdf.text(x + dx, y + 0.5 * self.ALTO_FILA + 0.3 * pdf.font_size, texto)
+
+    def fila_tabla(self, pdf, x, y, valores):
+        """Una fila de la tabla de detalle (celdas con borde y texto a la izquierda)."""
+        dy = 0.5 * self.ALTO_FILA + 0.3 * pdf.font_size
+        for (ancho, _), valor in zip(self.COLUMNAS, valores):
+            pdf.rect(x, y, ancho, self.ALTO_FILA)
+            pdf.text(x + self.c_margin, y + dy, valor)
+            x += ancho
+
+    @staticmethod
+    def dibujar(pdf, elementos, x, y):
+        for elemento in elementos:
+            if elemento[0] == 'rect':
+                _, dx, dy, ancho, alto = elemento
+                pdf.rect(x + dx, y + dy, ancho, alto)
+            else:
+                _, estilo, tamano, dx, dy, texto = elemento
+                pdf.set_font(_FUENTE, estilo, tamano)
+                pdf.text(x + dx, y + dy, texto)
+
 
 class BoletaFacade:
-    def __init__(self, pedido):
+    def __init__(self, pedido, numero=None, fecha=None):
         self.pedido = pedido
+        self.numero = numero
+        self.fecha = fecha
         self.detalle = ""
+        # (nombre, cantidad, precio_unitario, subtotal) por línea, para los renderizadores de texto
+        self.lineas = []
         self.subtotal = 0
         self.iva = 0
         self.total = 0
 
     def generar_detalle_boleta(self):
         self.detalle = ""
+        self.lineas = []
         for item in self.pedido.menus:
             subtotal = item.precio * item.cantidad
+            self.lineas.append((item.nombre, item.cantidad, item.precio, subtotal))
             self.detalle += f"{item.nombre:<30} {item.cantidad:<10} ${item.precio:<10.2f} ${subtotal:<10.2f}\n"
         
         self.subtotal = self.pedido.calcular_total()
         self.iva = self.subtotal * 0.19
         self.total = self.subtotal + self.iva
 
-    def crear_pdf(self):
+    def crear_pdf(self, pdf_filename="boleta.pdf", usar_plantilla=True, como_bytes=False):
+        """Genera el PDF; con como_bytes=True lo retorna en memoria sin escribir pdf_filename."""
+        if not usar_plantilla:
+            return self._crear_pdf_sin_plantilla(pdf_filename, como_bytes)
+
+        plantilla = _PlantillaBoleta.obtener()
+        alto = plantilla.ALTO_FILA
+        pdf = FPDF()
+        pdf.add_page()
+        x = pdf.l_margin
+
+        plantilla.dibujar(pdf, plantilla.encabezado, x, pdf.t_margin)
+
+        # partes variables: número, fecha, líneas y totales
+        y = pdf.t_margin + plantilla.alto_encabezado
+        fecha = self.fecha or datetime.now()
+        variables = [f"Fecha: {fecha.strftime('%d/%m/%Y %H:%M:%S')}"]
+        if self.numero is not None:
+            variables.insert(0, f"Boleta N° {self.numero:06d}")
+        pdf.set_font(_FUENTE, size=12)
+        for texto in variables:
+            plantilla.texto_derecha(pdf, x, y, plantilla.ancho_util, texto)
+            y += alto
+        y += 10
+
+        plantilla.dibujar(pdf, plantilla.titulos_tabla, x, y)
+        y += alto
+
+        pdf.set_font(_FUENTE, size=12)
+        for item in self.pedido.menus:
+            subtotal = item.precio * item.cantidad
+            y = _asegurar_espacio(pdf, y, alto)
+            plantilla.fila_tabla(pdf, x, y, (item.nombre, str(item.cantidad), f"${item.precio:.2f}", f"${subtotal:.2f}"))
+            y += alto
+
+        y = _asegurar_espacio(pdf, y, alto * len(plantilla.etiquetas_totales))
+        plantilla.dibujar(pdf, plantilla.etiquetas_totales, x, y)
+        pdf.set_font(_FUENTE, 'B', 12)
+        for valor in (self.subtotal, self.iva, self.total):
+            plantilla.texto_derecha(pdf, x + plantilla.ANCHO_ETIQUETA_TOTAL, y, plantilla.ANCHO_VALOR_TOTAL, f"${valor:.2f}")
+            y += alto
+
+        y = _asegurar_espacio(pdf, y, alto * len(plantilla.pie))
+        plantilla.dibujar(pdf, plantilla.pie, x, y)
+
+        return _salida_pdf(pdf, pdf_filename, como_bytes)
+
+    def _crear_pdf_sin_plantilla(self, pdf_filename="boleta.pdf", como_bytes=False):
+        """Versión que dibuja todo celda por celda; se mantiene para comparar en benchmark_boletas."""
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
@@ -31,7 +229,10 @@ class BoletaFacade:
         pdf.cell(0, 10, "RUT: 12345678-9", ln=True, align='L')
         pdf.cell(0, 10, "Dirección: Calle Falsa 123", ln=True, align='L')
         pdf.cell(0, 10, "Teléfono: +56 9 4733 7031", ln=True, align='L')
-        pdf.cell(0, 10, f"Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True, align='R')
+        if self.numero is not None:
+            pdf.cell(0, 10, f"Boleta N° {self.numero:06d}", ln=True, align='R')
+        fecha = self.fecha or datetime.now()
+        pdf.cell(0, 10, f"Fecha: {fecha.strftime('%d/%m/%Y %H:%M:%S')}", ln=True, align='R')
         pdf.ln(10)
         
         pdf.set_font("Arial", 'B', 12)
@@ -65,12 +266,114 @@ class BoletaFacade:
         pdf.cell(0, 10, "Los productos adquiridos no tienen garantía.", 0, 1, 'C')
         
 
-        pdf_filename = "boleta.pdf"
-        pdf.output(pdf_filename)
-        return pdf_filename
+        return _salida_pdf(pdf, pdf_filename, como_bytes)
 
-    def generar_boleta(self):
-        """Coordina la generación de la boleta y la creación del PDF."""
+    def _lineas_texto(self, ancho=ANCHO_TICKET):
+        """Boleta como lista de (estilo, texto) de a lo más 'ancho' caracteres.
+
+        estilo es '' (normal), 'B' (negrita), 'T' (título) o 'C' (centrado).
+        """
+        separador = "-" * ancho
+        col_nombre = ancho - 28
+        lineas = []
+        for i, (_, _, texto) in enumerate(_PlantillaBoleta.ENCABEZADO):
+            lineas.append(('T' if i == 0 else '', texto[:ancho]))
+        if self.numero is not None:
+            lineas.append(('B', f"Boleta N° {self.numero:06d}"))
+        fecha = self.fecha or datetime.now()
+        lineas.append(('', f"Fecha: {fecha.strftime('%d/%m/%Y %H:%M:%S')}"))
+        lineas.append(('', separador))
+        lineas.append(('B', f"{'Nombre':<{col_nombre}}{'Cant':>5}{'P.Unit':>11}{'Subtotal':>12}"))
+        for nombre, cantidad, precio, subtotal in self.lineas:
+            lineas.append(('', f"{nombre[:col_nombre - 1]:<{col_nombre}}{cantidad:>5}{f'${precio:.2f}':>11}{f'${subtotal:.2f}':>12}"))
+        lineas.append(('', separador))
+        for etiqueta, valor in zip(_PlantillaBoleta.ETIQUETAS_TOTALES, (self.subtotal, self.iva, self.total)):
+            lineas.append(('B' if etiqueta == "Total:" else '', f"{etiqueta:>{ancho - 14}}{f'${valor:.2f}':>14}"))
+        lineas.append(('', ""))
+        for texto in _PlantillaBoleta.PIE:
+            for parte in textwrap.wrap(texto, ancho):
+                lineas.append(('C', parte))
+        return lineas
+
+    def generar_texto(self, ancho=ANCHO_TICKET):
+        """Boleta en texto plano de ancho fijo (48 columnas = papel térmico de 80 mm)."""
+        partes = []
+        for estilo, texto in self._lineas_texto(ancho):
+            partes.append(texto.center(ancho).rstrip() if estilo in ('T', 'C') else texto)
+        return "\n".join(partes) + "\n"
+
+    def generar_escpos(self, ancho=ANCHO_TICKET, codificacion="cp850"):
+        """Boleta como bytes ESC/POS listos para enviar a una impresora térmica."""
+        datos = bytearray(_ESC_INICIAR + _ESC_CODEPAGE_PC850)
+        for estilo, texto in self._lineas_texto(ancho):
+            if estilo == 'T':
+                datos += _ESC_CENTRAR + _ESC_DOBLE + texto.encode(codificacion, "replace") + b"\n" + _ESC_NORMAL + _ESC_IZQUIERDA
+            elif estilo == 'C':
+                datos += _ESC_CENTRAR + texto.encode(codificacion, "replace") + b"\n" + _ESC_IZQUIERDA
+            elif estilo == 'B':
+                datos += _ESC_NEGRITA + texto.encode(codificacion, "replace") + b"\n" + _ESC_SIN_NEGRITA
+            else:
+                datos += texto.encode(codificacion, "replace") + b"\n"
+        datos += _ESC_AVANZAR_Y_CORTAR
+        return bytes(datos)
+
+    def imprimir(self, destino, formato="escpos"):
+        """Escribe la boleta en 'destino': una ruta (archivo, FIFO o dispositivo como /dev/usb/lp0)
+        o un objeto con write(). formato es "escpos" o "texto"."""
+        if formato == "escpos":
+            datos = self.generar_escpos()
+        elif formato == "texto":
+            datos = self.generar_texto().encode("utf-8")
+        else:
+            raise ValueError(f"Formato de impresión desconocido: {formato}")
+
+        if hasattr(destino, "write"):
+            destino.write(datos)
+            return destino
+        # "ab": un archivo usado como impresora acumula las boletas en vez de quedarse con la última
+        with open(destino, "ab") as salida:
+            salida.write(datos)
+        return destino
+
+    def generar_boleta(self, formato="pdf", destino=None):
+        """Coordina la generación de la boleta y su salida (PDF, texto o ESC/POS)."""
         self.generar_detalle_boleta()
-        pdf_path = self.crear_pdf()
-        return(f"Boleta generada y guardada en: {pdf_path}")
+        if formato == "pdf":
+            pdf_path = self.crear_pdf(destino or "boleta.pdf")
+            return(f"Boleta generada y guardada en: {pdf_path}")
+        self.imprimir(destino, formato=formato)
+        return(f"Boleta enviada a: {destino}")
+
+
+def benchmark_boletas(cantidad=200, lineas=10):
+    """Mide boletas por segundo con y sin plantilla. Uso: python BoletaFacade.py [cantidad]"""
+    import os
+    import tempfile
+    import time
+    from Pedido import Pedido
+    from Menu_catalog import get_default_menus
+
+    pedido = Pedido()
+    menus = get_default_menus()
+    for i in range(lineas):
+        pedido.agregar_menu(menus[i % len(menus)], 1 + i % 3)
+    facade = BoletaFacade(pedido, numero=1)
+    facade.generar_detalle_boleta()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "boleta.pdf")
+        for nombre, usar_plantilla in (("sin plantilla", False), ("con plantilla", True)):
+            facade.crear_pdf(ruta, usar_plantilla=usar_plantilla)
+            inicio = time.perf_counter()
+            for _ in range(cantidad):
+                facade.crear_pdf(ruta, usar_plantilla=usar_plantilla)
+            resultados[nombre] = cantidad / (time.perf_counter() - inicio)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for nombre, por_segundo in benchmark_boletas(cantidad).items():
+        print(f"{nombre:<15} {por_segundo:8.1f} boletas/s")
@@ -0,0 +1,119 @@
+# BoletaSpooler.py
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional, Tuple
+from Pedido import Pedido
+from bloqueo_archivos import bloqueo_archivo
+
+
+class BoletaGenerada(NamedTuple):
+    numero: int
+    # PDF archivado, o la impresora si no se archiva
+    ruta: str
+    # el mismo PDF en memoria, para mostrarlo sin volver a leerlo del disco
+    pdf: bytes
+
+
+class BoletaSpooler:
+    """Numera las boletas y genera sus PDF en segundo plano.
+
+    Cada boleta recibe un número correlativo (persistido en disco y tomado
+    con un lock de archivo, así varias cajas pueden compartir la carpeta) y
+    se guarda en su propio archivo boletas/AAAA/MM/000123.pdf, así dos ventas
+    seguidas no se pisan y el hilo de la interfaz no espera a FPDF. Si hay impresora
+    configurada, se le envía la boleta en ESC/POS (o texto) y el PDF queda
+    como archivo opcional. La impresora tiene un solo hilo propio, así las
+    boletas salen enteras y en orden de número aunque los PDF se generen en
+    paralelo.
+    """
+
+    DIRECTORIO = os.path.join(os.path.dirname(__file__), "boletas")
+
+    def __init__(self, directorio: Optional[str] = None, max_workers: int = 2,
+                 impresora: Optional[str] = None, formato_impresora: str = "escpos", archivar_pdf: bool = True):
+        self.directorio = directorio or self.DIRECTORIO
+        # ruta de la impresora térmica (dispositivo, FIFO o archivo); None para no imprimir
+        self.impresora = impresora
+        self.formato_impresora = formato_impresora
+        self.archivar_pdf = archivar_pdf or not impresora
+        # reentrante: encolar() lo toma para numerar y encolar la impresión en el mismo orden
+        self._lock = threading.RLock()
+        # hilos y no procesos: cada boleta tarda pocos ms y así no hay que serializar el pedido
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="boleta")
+        self._impresion = ThreadPoolExecutor(max_workers=1, thread_name_prefix="impresora") if impresora else None
+
+    def _ruta_contador(self) -> str:
+        return os.path.join(self.directorio, "ultimo_numero.txt")
+
+    def _leer_ultimo_numero(self) -> int:
+        try:
+            with open(self._ruta_contador(), encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _siguiente_numero(self) -> int:
+        os.makedirs(self.directorio, exist_ok=True)
+        # el contador se vuelve a leer con el lock tomado: otra caja pudo avanzarlo
+        with self._lock, bloqueo_archivo(os.path.join(self.directorio, "ultimo_numero.lock")):
+            numero = self._leer_ultimo_numero() + 1
+            fd, tmp_path = tempfile.mkstemp(prefix=".numero_", suffix=".tmp", dir=self.directorio)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(numero))
+            os.replace(tmp_path, self._ruta_contador())
+            return numero
+
+    def ruta_boleta(self, numero: int, fecha: datetime) -> str:
+        return os.path.join(self.directorio, f"{fecha:%Y}", f"{fecha:%m}", f"{numero:06d}.pdf")
+
+    def encolar(self, pedido: Pedido, callback: Optional[Callable[[Future], None]] = None) -> Tuple[int, Future]:
+        """Asigna número a la boleta y la deja en cola.
+
+        Retorna (numero, futuro); el futuro entrega una BoletaGenerada con la
+        ruta del PDF (o la de la impresora si no se archiva) y el PDF en bytes.
+
+        callback(futuro) se llama desde el hilo que generó el PDF, no desde el de Tk.
+        """
+        copia = pedido.copia()
+        with self._lock:
+            numero = self._siguiente_numero()
+            fecha = datetime.now()
+            impresion = None
+            if self._impresion is not None:
+                impresion = self._impresion.submit(self._imprimir, copia, numero, fecha)
+        futuro = self._executor.submit(self._generar, copia, numero, fecha, self.ruta_boleta(numero, fecha), impresion)
+        if callback is not None:
+            futuro.add_done_callback(callback)
+        return numero, futuro
+
+    def _imprimir(self, pedido: Pedido, numero: int, fecha: datetime) -> None:
+        from BoletaFacade import BoletaFacade
+        facade = BoletaFacade(pedido, numero=numero, fecha=fecha)
+        facade.generar_detalle_boleta()
+        facade.imprimir(self.impresora, formato=self.formato_impresora)
+
+    def _generar(self, pedido: Pedido, numero: int, fecha: datetime, ruta: str,
+                 impresion: Optional[Future] = None) -> BoletaGenerada:
+        # fpdf se importa en el primer uso, no al iniciar la aplicación
+        from BoletaFacade import BoletaFacade
+        facade = BoletaFacade(pedido, numero=numero, fecha=fecha)
+        facade.generar_detalle_boleta()
+        pdf = facade.crear_pdf(como_bytes=True)
+        if impresion is not None:
+            # el futuro de la boleta termina cuando también salió por la impresora (y propaga sus errores)
+            impresion.result()
+        if not self.archivar_pdf:
+            return BoletaGenerada(numero, self.impresora, pdf)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # "xb": si el número ya tiene PDF (contador restaurado de un respaldo) falla en vez de pisarlo
+        with open(ruta, "xb") as f:
+            f.write(pdf)
+        return BoletaGenerada(numero, ruta, pdf)
+
+    def cerrar(self, esperar: bool = True) -> None:
+        if self._impresion is not None:
+            self._impresion.shutdown(wait=esperar)
+        self._executor.shutdown(wait=esperar)
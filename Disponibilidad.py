@@ -0,0 +1,146 @@
+# Disponibilidad.py
+from typing import Dict, List, Optional
+import numpy as np
+from IMenu import IMenu
+from Stock import Stock
+
+
+class MotorDisponibilidad:
+    """Calcula cuántas porciones de cada menú alcanzan con el stock actual.
+
+    Las recetas se compilan una vez en una matriz de requerimientos
+    (menús x ingredientes); cada recálculo es una sola operación vectorizada
+    contra el vector de stock. Conectado a un Stock, solo recalcula los menús
+    que usan los ingredientes que cambiaron.
+    """
+
+    def __init__(self, menus: List[IMenu]):
+        self.menus = list(menus)
+        self.nombres_menus = [m.nombre for m in self.menus]
+        self._fila_de = {nombre: i for i, nombre in enumerate(self.nombres_menus)}
+
+        columnas: Dict[str, int] = {}
+        celdas = []
+        for i, menu in enumerate(self.menus):
+            for req in menu.ingredientes:
+                clave = Stock.normalizar_nombre(req.nombre)
+                j = columnas.setdefault(clave, len(columnas))
+                celdas.append((i, j, float(req.cantidad)))
+
+        # claves normalizadas de los ingredientes, en el orden de las columnas
+        self.ingredientes = list(columnas)
+        self._columna_de = columnas
+        self.requerimientos = np.zeros((len(self.menus), len(columnas)))
+        for i, j, cantidad in celdas:
+            self.requerimientos[i, j] += cantidad
+
+        # índice inverso: ingrediente -> filas de los menús que lo usan
+        self._filas_por_ingrediente = {
+            clave: np.nonzero(self.requerimientos[:, j])[0] for clave, j in columnas.items()
+        }
+        self._columnas_por_fila = [np.nonzero(fila)[0] for fila in self.requerimientos]
+
+        # np.inf para menús sin ingredientes
+        self.porciones = np.zeros(len(self.menus))
+        self._stock = None
+        self._suscriptores = []
+
+    @classmethod
+    def desde_db(cls, db) -> "MotorDisponibilidad":
+        """Compila el catálogo desde las tablas menus / menu_ingredientes."""
+        from sqlalchemy.orm import selectinload
+        from models import Menu, MenuIngrediente
+        from ElementoMenu import CrearMenu
+        from Ingrediente import Ingrediente
+
+        menus_db = db.query(Menu).options(
+            selectinload(Menu.ingredientes_asociados).selectinload(MenuIngrediente.ingrediente)
+        ).order_by(Menu.nombre).all()
+        menus = [
+            CrearMenu(
+                m.nombre,
+                [Ingrediente(mi.ingrediente.nombre, mi.ingrediente.unidad, mi.cantidad_requerida) for mi in m.ingredientes_asociados],
+                precio=m.precio,
+                icono_path=m.icono_path,
+            )
+            for m in menus_db
+        ]
+        return cls(menus)
+
+    def menus_que_usan(self, nombre_ingrediente: str) -> List[IMenu]:
+        filas = self._filas_por_ingrediente.get(Stock.normalizar_nombre(nombre_ingrediente), ())
+        return [self.menus[i] for i in filas]
+
+    def conectar(self, stock: Stock) -> None:
+        """Calcula todo una vez y luego se actualiza solo con cada cambio del stock."""
+        self._stock = stock
+        stock.suscribir(self._stock_cambio)
+        self.calcular(stock)
+
+    def suscribir(self, callback, solo_disponibilidad: bool = True) -> None:
+        """Registra callback({nombre_menu: porciones}).
+
+        Con solo_disponibilidad=True se avisa solo de los menús que pasaron de
+        disponible a agotado o al revés; si no, de cualquier cambio de porciones.
+        """
+        self._suscriptores.append((callback, solo_disponibilidad))
+
+    def _stock_cambio(self, nombres) -> None:
+        if nombres is None:
+            filas = np.arange(len(self.menus))
+        else:
+            indices = [self._filas_por_ingrediente[n] for n in nombres if n in self._filas_por_ingrediente]
+            if not indices:
+                return
+            filas = np.unique(np.concatenate(indices))
+        self.recalcular(filas)
+
+    def recalcular(self, filas: np.ndarray) -> None:
+        """Recalcula solo las filas (menús) indicadas y avisa a los suscriptores."""
+        if len(filas) == 0 or self._stock is None:
+            return
+        columnas = np.unique(np.concatenate([self._columnas_por_fila[i] for i in filas]))
+        stock_columnas = np.array([self._stock.cantidad_de(self.ingredientes[j]) for j in columnas], dtype=float)
+        nuevas = self._porciones(self.requerimientos[np.ix_(filas, columnas)], stock_columnas)
+
+        anteriores = self.porciones[filas]
+        self.porciones[filas] = nuevas
+
+        cambiaron = filas[nuevas != anteriores]
+        if len(cambiaron) == 0 or not self._suscriptores:
+            return
+        volteadas = filas[(nuevas > 0) != (anteriores > 0)]
+        for callback, solo_disponibilidad in list(self._suscriptores):
+            afectadas = volteadas if solo_disponibilidad else cambiaron
+            if len(afectadas) == 0:
+                continue
+            try:
+                callback({self.nombres_menus[i]: self.porciones_de(self.nombres_menus[i]) for i in afectadas})
+            except Exception as e:
+                print(f"Error notificando disponibilidad: {e}")
+
+    def vector_stock(self, stock: Stock) -> np.ndarray:
+        return np.array([stock.cantidad_de(clave) for clave in self.ingredientes], dtype=float)
+
+    def calcular(self, stock: Stock) -> Dict[str, Optional[int]]:
+        """Recalcula las porciones de todos los menús y las retorna por nombre."""
+        self.porciones = self._porciones(self.requerimientos, self.vector_stock(stock))
+        return self.como_dict()
+
+    @classmethod
+    def _porciones(cls, requerimientos: np.ndarray, stock: np.ndarray) -> np.ndarray:
+        if requerimientos.shape[1] == 0:
+            return np.full(requerimientos.shape[0], np.inf)
+        disponible = np.maximum(stock, 0.0) + Stock.TOLERANCIA
+        usa = requerimientos > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alcanza = np.where(usa, disponible / np.where(usa, requerimientos, 1.0), np.inf)
+        return np.floor(alcanza.min(axis=1))
+
+    def porciones_de(self, nombre_menu: str) -> Optional[int]:
+        """Porciones disponibles de un menú; None si no tiene límite (sin ingredientes)."""
+        valor = self.porciones[self._fila_de[nombre_menu]]
+        return None if np.isinf(valor) else int(valor)
+
+    def como_dict(self) -> Dict[str, Optional[int]]:
+        return {nombre: self.porciones_de(nombre) for nombre in self.nombres_menus}
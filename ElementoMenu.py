@@ -14,13 +14,10 @@ class CrearMenu(IMenu):
 
     def esta_disponible(self, stock: Stock) -> bool:
         for req in self.ingredientes:
-            ok = False
-            for ing in stock.lista_ingredientes:
-                if ing.nombre == req.nombre and (req.unidad is None or ing.unidad == req.unidad):
-                    if int(ing.cantidad) >= int(req.cantidad):
-                        ok = True
-                        break
-            if not ok:
+            ing = stock.buscar(req.nombre)
+            if ing is None or (req.unidad is not None and ing.unidad != req.unidad):
+                return False
+            if float(ing.cantidad) + Stock.TOLERANCIA < float(req.cantidad):
                 return False
         return True
 
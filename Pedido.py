@@ -2,49 +2,96 @@ from ElementoMenu import CrearMenu
 from dataclasses import replace
 
 
+class LineaPedido:
+    """Línea de un pedido. Referencia el menú del catálogo en vez de copiar su receta."""
+
+    __slots__ = ('menu', 'cantidad', 'precio')
+
+    def __init__(self, menu: CrearMenu, cantidad: int, precio: float):
+        self.menu = menu
+        self.cantidad = cantidad
+        # precio unitario al momento de la venta
+        self.precio = precio
+
+    @property
+    def nombre(self) -> str:
+        return self.menu.nombre
+
+    @property
+    def ingredientes(self):
+        return self.menu.ingredientes
+
+    @property
+    def icono_path(self):
+        return getattr(self.menu, 'icono_path', None)
+
+    def __repr__(self):
+        return f"LineaPedido({self.nombre!r}, cantidad={self.cantidad}, precio={self.precio})"
+
+
 class Pedido:
     def __init__(self):
-        self.menus = []
+        # nombre del menú -> línea del pedido (el dict mantiene el orden de inserción)
+        self._lineas = {}
+        self._total = 0.0
 
-    def agregar_menu(self, menu: CrearMenu):
-        """Agrega un menú al pedido. Si ya existe, incrementa su cantidad."""
-        for m in self.menus:
-            if m.nombre == menu.nombre:
-                m.cantidad = int(m.cantidad) + 1
-                return True
+    @property
+    def menus(self):
+        """Vista de solo lectura de las líneas del pedido, en el orden en que se agregaron."""
+        return self._lineas.values()
 
+    @staticmethod
+    def _precio(menu) -> float:
         try:
-            nueva = CrearMenu(menu.nombre, list(menu.ingredientes), precio=menu.precio, icono_path=getattr(menu, 'icono_path', None), cantidad=1)
+            return float(menu.precio)
         except Exception:
-            nueva = CrearMenu(menu.nombre, menu.ingredientes, precio=getattr(menu, 'precio', 0.0), icono_path=getattr(menu, 'icono_path', None), cantidad=1)
-        self.menus.append(nueva)
+            return 0.0
+
+    def agregar_menu(self, menu: CrearMenu, cantidad: int = 1):
+        """Agrega un menú al pedido. Si ya existe, incrementa su cantidad."""
+        cantidad = int(cantidad)
+        if cantidad <= 0:
+            return False
+
+        linea = self._lineas.get(menu.nombre)
+        if linea is not None:
+            linea.cantidad += cantidad
+        else:
+            linea = LineaPedido(menu, cantidad, self._precio(menu))
+            self._lineas[menu.nombre] = linea
+        self._total += linea.precio * cantidad
         return True
 
-    def eliminar_menu(self, nombre_menu: str):
+    def eliminar_menu(self, nombre_menu: str, cantidad: int = 1):
         """Disminuye la cantidad de un menú o lo elimina si la cantidad llega a 0."""
-        for m in list(self.menus):
-            if m.nombre == nombre_menu:
-                try:
-                    if int(m.cantidad) > 1:
-                        m.cantidad = int(m.cantidad) - 1
-                    else:
-                        self.menus.remove(m)
-                    return True
-                except Exception:
-                    
-                    self.menus.remove(m)
-                    return True
-        return False
+        linea = self._lineas.get(nombre_menu)
+        if linea is None:
+            return False
+        cantidad = int(cantidad)
+        if cantidad <= 0:
+            return False
+        if cantidad >= linea.cantidad:
+            cantidad = linea.cantidad
+            del self._lineas[nombre_menu]
+        else:
+            linea.cantidad -= cantidad
+        self._total -= linea.precio * cantidad
+        if not self._lineas:
+            # evita arrastrar errores de redondeo cuando el pedido queda vacío
+            self._total = 0.0
+        return True
+
+    def copia(self) -> "Pedido":
+        """Copia independiente de las líneas (los menús del catálogo se comparten)."""
+        nuevo = Pedido()
+        for nombre, linea in self._lineas.items():
+            nuevo._lineas[nombre] = LineaPedido(linea.menu, linea.cantidad, linea.precio)
+        nuevo._total = self._total
+        return nuevo
 
     def mostrar_pedido(self):
         """Retorna una lista de tuplas (nombre, cantidad, precio_unitario)."""
         return [(m.nombre, m.cantidad, m.precio) for m in self.menus]
 
     def calcular_total(self) -> float:
-        total = 0.0
-        for m in self.menus:
-            try:
-                total += float(m.precio) * int(m.cantidad)
-            except Exception:
-                pass
-        return float(total)
+        return float(self._total)
@@ -1,19 +1,26 @@
+# Las dependencias pesadas (pandas, PyMuPDF, fpdf) se importan recién al usarlas.
+# Para medir el arranque: RESTAURANTE_PERFIL_ARRANQUE=1 python -X importtime Restaurante.py 2> importtime.log
+import time
+_INICIO_PROCESO = time.perf_counter()
+
 from ElementoMenu import CrearMenu
 import customtkinter as ctk
 from tkinter import ttk, Toplevel, Label, messagebox
 from Ingrediente import Ingrediente
 from Stock import Stock
 import re
-from PIL import Image
 from CTkMessagebox import CTkMessagebox
 from Pedido import Pedido
-from BoletaFacade import BoletaFacade
-import pandas as pd
+from BoletaSpooler import BoletaSpooler
+from cache_iconos import CacheIconos
+from grilla_menus import GrillaMenus
 from tkinter import filedialog
 from Menu_catalog import get_default_menus
-from menu_pdf import create_menu_pdf
-from ctk_pdf_viewer import CTkPDFViewer
+from Disponibilidad import MotorDisponibilidad
 import os
+import sys
+import queue
+import threading
 from tkinter.font import nametofont
 class AplicacionConPestanas(ctk.CTk):
     
@@ -27,44 +34,115 @@ class AplicacionConPestanas(ctk.CTk):
 
         self.stock = Stock()
         self.menus_creados = set()
+        # Treeview del stock: id de fila -> valores mostrados; None en _stock_pendiente = revisar todo
+        self._valores_tree = {}
+        self._stock_pendiente = None
+        self._job_treeview = None
+        self.stock.suscribir(self._stock_cambio)
+        self._valores_pedido = {}
+        self._job_treeview_pedido = None
 
         self.pedido = Pedido()
+        # RESTAURANTE_IMPRESORA=/dev/usb/lp0 envía cada boleta en ESC/POS a la impresora térmica
+        self.boletas = BoletaSpooler(impresora=os.environ.get("RESTAURANTE_IMPRESORA"))
+        self._boleta = None
 
         self.menus = get_default_menus()  
+        CacheIconos.compartido().precargar([m.icono_path for m in self.menus], (64, 64))
+        self.disponibilidad = MotorDisponibilidad(self.menus)
+        self.disponibilidad.conectar(self.stock)
+        self.disponibilidad.suscribir(self.actualizar_porciones, solo_disponibilidad=False)
   
+        self._boleta_mostrable= False
+
         self.tabview = ctk.CTkTabview(self,command=self.on_tab_change)
         self.tabview.pack(expand=True, fill="both", padx=10, pady=10)
 
         self.crear_pestanas()
 
-        self._boleta_mostrable= False
+        if os.environ.get("RESTAURANTE_PERFIL_ARRANQUE"):
+            self.after_idle(self._reportar_arranque)
+
+        self.protocol("WM_DELETE_WINDOW", self.al_cerrar)
+
+    def _reportar_arranque(self):
+        """Imprime el tiempo hasta que la ventana atiende eventos y qué módulos pesados ya se cargaron."""
+        pesados = [m for m in ("pandas", "numpy", "fitz", "fpdf", "PIL") if m in sys.modules]
+        print(f"[arranque] ventana lista en {(time.perf_counter() - _INICIO_PROCESO) * 1000:.0f} ms; "
+              f"pestañas construidas: {sorted(self._pestanas_construidas)}; módulos pesados cargados: {pesados}")
+
+    def al_cerrar(self):
+        try:
+            self.stock.flush()
+            self.boletas.cerrar(esperar=True)
+        finally:
+            self.destroy()
 
     def actualizar_treeview(self):
+        """Reconcilia todo el Treeview del stock contra el Stock (ids = nombre normalizado)."""
+        self._stock_pendiente = None
+        self._aplicar_cambios_treeview()
+
+    def _stock_cambio(self, nombres):
+        # se acumulan los cambios de una ráfaga y se aplican juntos en un solo after_idle
+        if nombres is None or self._stock_pendiente is None:
+            self._stock_pendiente = None
+        else:
+            self._stock_pendiente |= nombres
+        if self._job_treeview is None:
+            self._job_treeview = self.after_idle(self._aplicar_cambios_treeview)
+
+    def _aplicar_cambios_treeview(self):
+        if self._job_treeview is not None:
+            self.after_cancel(self._job_treeview)
+            self._job_treeview = None
+        pendiente, self._stock_pendiente = self._stock_pendiente, set()
+        if not hasattr(self, "tree"):
+            return
+
+        if pendiente is None:
+            filas = {}
+            for ingrediente in self.stock.verificar_stock():
+                filas.setdefault(Stock.normalizar_nombre(ingrediente.nombre), ingrediente)
+            sobrantes = [iid for iid in self._valores_tree if iid not in filas]
+        else:
+            filas = {clave: self.stock.buscar(clave) for clave in pendiente}
+            sobrantes = [clave for clave, ing in filas.items() if ing is None and clave in self._valores_tree]
+            filas = {clave: ing for clave, ing in filas.items() if ing is not None}
 
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        if sobrantes:
+            self.tree.delete(*sobrantes)
+            for iid in sobrantes:
+                del self._valores_tree[iid]
 
-        for ingrediente in self.stock.lista_ingredientes:
+        for iid, ingrediente in filas.items():
             try:
                 cantidad_mostrada = ingrediente.cantidad_str()
             except Exception:
                 cantidad_mostrada = ingrediente.cantidad
-            self.tree.insert("", "end", values=(ingrediente.nombre, ingrediente.unidad if ingrediente.unidad else '', cantidad_mostrada))
+            valores = (ingrediente.nombre, ingrediente.unidad if ingrediente.unidad else '', cantidad_mostrada)
+            anteriores = self._valores_tree.get(iid)
+            if anteriores == valores:
+                continue
+            if anteriores is None:
+                self.tree.insert("", "end", iid=iid, values=valores)
+            else:
+                self.tree.item(iid, values=valores)
+            self._valores_tree[iid] = valores
 
     def on_tab_change(self):
         selected_tab = self.tabview.get()
+        self._asegurar_pestana(selected_tab)
         if selected_tab == "carga de ingredientes":
             print('carga de ingredientes')
         if selected_tab == "Stock":
-            self.actualizar_treeview()
+            # si el CSV cambió afuera, Stock avisa y el Treeview se pone al día en el próximo after_idle
+            self.stock.refresh_if_stale()
         if selected_tab == "Pedido":
-            self.actualizar_treeview()
             print('pedido')
         if selected_tab == "Carta restorante":
-            self.actualizar_treeview()
             print('Carta restorante')
         if selected_tab == "Boleta":
-            self.actualizar_treeview()
             print('Boleta')  
 
     def crear_pestanas(self):
@@ -73,12 +151,23 @@ class AplicacionConPestanas(ctk.CTk):
         self.tab4 = self.tabview.add("Carta restorante")  
         self.tab2 = self.tabview.add("Pedido")
         self.tab5 = self.tabview.add("Boleta")
-        
-        self.configurar_pestana1()
-        self.configurar_pestana2()
-        self.configurar_pestana3()
-        self._configurar_pestana_crear_menu()
-        self._configurar_pestana_ver_boleta()
+
+        # los widgets de cada pestaña se crean la primera vez que se selecciona
+        self._constructores_pestanas = {
+            "carga de ingredientes": self.configurar_pestana3,
+            "Stock": self.configurar_pestana1,
+            "Carta restorante": self._configurar_pestana_crear_menu,
+            "Pedido": self.configurar_pestana2,
+            "Boleta": self._configurar_pestana_ver_boleta,
+        }
+        self._pestanas_construidas = set()
+        self._asegurar_pestana(self.tabview.get())
+
+    def _asegurar_pestana(self, nombre):
+        if nombre in self._pestanas_construidas or nombre not in self._constructores_pestanas:
+            return
+        self._pestanas_construidas.add(nombre)
+        self._constructores_pestanas[nombre]()
 
     def configurar_pestana3(self):
         label = ctk.CTkLabel(self.tab3, text="Carga de archivo CSV")
@@ -91,10 +180,34 @@ class AplicacionConPestanas(ctk.CTk):
         self.frame_tabla_csv.pack(fill="both", expand=True, padx=10, pady=10)
         self.df_csv = None   
         self.tabla_csv = None
+        self.pagina_actual_csv = 0
+
+        # la vista previa muestra una página del DataFrame a la vez
+        self.frame_paginas_csv = ctk.CTkFrame(self.frame_tabla_csv)
+        self.boton_pagina_anterior = ctk.CTkButton(self.frame_paginas_csv, text="< Anterior", width=100, command=lambda: self.mostrar_pagina_csv(self.pagina_actual_csv - 1))
+        self.boton_pagina_anterior.pack(side="left", padx=10)
+        self.label_pagina_csv = ctk.CTkLabel(self.frame_paginas_csv, text="")
+        self.label_pagina_csv.pack(side="left", padx=10)
+        self.boton_pagina_siguiente = ctk.CTkButton(self.frame_paginas_csv, text="Siguiente >", width=100, command=lambda: self.mostrar_pagina_csv(self.pagina_actual_csv + 1))
+        self.boton_pagina_siguiente.pack(side="left", padx=10)
+        self.label_resumen_csv = ctk.CTkLabel(self.frame_paginas_csv, text="", anchor="e")
+        self.label_resumen_csv.pack(side="right", padx=10)
 
         self.boton_agregar_stock = ctk.CTkButton(self.frame_tabla_csv, text="Agregar al Stock")
         self.boton_agregar_stock.pack(side="bottom", pady=10)
 
+        self.frame_progreso_csv = ctk.CTkFrame(self.frame_tabla_csv)
+        self.barra_progreso_csv = ctk.CTkProgressBar(self.frame_progreso_csv)
+        self.barra_progreso_csv.set(0)
+        self.barra_progreso_csv.pack(side="left", fill="x", expand=True, padx=10)
+        self.label_progreso_csv = ctk.CTkLabel(self.frame_progreso_csv, text="")
+        self.label_progreso_csv.pack(side="left", padx=10)
+        self.boton_cancelar_csv = ctk.CTkButton(self.frame_progreso_csv, text="Cancelar", fg_color="#B11919", command=self.cancelar_carga_csv)
+        self.boton_cancelar_csv.pack(side="left", padx=10)
+
+        self._carga_csv_cancelada = threading.Event()
+        self._cola_carga_csv = queue.Queue()
+
 
     def agregar_csv_al_stock(self):
         if self.df_csv is None:
@@ -104,15 +217,64 @@ class AplicacionConPestanas(ctk.CTk):
         if 'nombre' not in self.df_csv.columns or 'cantidad' not in self.df_csv.columns:
             CTkMessagebox(title="Error", message="El CSV debe tener columnas 'nombre' y 'cantidad'.", icon="warning")
             return
-        for _, row in self.df_csv.iterrows():
-            nombre = str(row['nombre'])
-            cantidad = row['cantidad']
-            unidad = row.get('unidad', '') if 'unidad' in row.index else ''
-            ingrediente = Ingrediente(nombre=nombre,unidad=unidad,cantidad=cantidad)
-            self.stock.agregar_ingrediente(ingrediente)
+
+        # el agrupado corre en un hilo aparte; el hilo de Tk solo lee la cola
+        self._carga_csv_cancelada.clear()
+        self.boton_agregar_stock.configure(state="disabled")
+        self.barra_progreso_csv.set(0)
+        self.label_progreso_csv.configure(text="0%")
+        self.frame_progreso_csv.pack(side="bottom", fill="x", pady=5)
+
+        df = self.df_csv
+        threading.Thread(target=self._agrupar_csv_en_segundo_plano, args=(df,), daemon=True).start()
+        self.after(100, self._revisar_carga_csv)
+
+    def _agrupar_csv_en_segundo_plano(self, df):
+        from carga_csv import agrupar_ingredientes, CargaCancelada
+        cola = self._cola_carga_csv
+        try:
+            agrupado = agrupar_ingredientes(
+                df,
+                progreso=lambda fraccion: cola.put(("progreso", fraccion)),
+                cancelado=self._carga_csv_cancelada.is_set,
+            )
+            cola.put(("listo", agrupado))
+        except CargaCancelada:
+            cola.put(("cancelado", None))
+        except Exception as e:
+            cola.put(("error", e))
+
+    def _revisar_carga_csv(self):
+        try:
+            while True:
+                tipo, dato = self._cola_carga_csv.get_nowait()
+                if tipo == "progreso":
+                    self.barra_progreso_csv.set(dato)
+                    self.label_progreso_csv.configure(text=f"{int(dato * 100)}%")
+                    continue
+                self._terminar_carga_csv(tipo, dato)
+                return
+        except queue.Empty:
+            pass
+        self.after(100, self._revisar_carga_csv)
+
+    def _terminar_carga_csv(self, tipo, dato):
+        self.frame_progreso_csv.pack_forget()
+        self.boton_agregar_stock.configure(state="normal")
+
+        if tipo == "cancelado" or self._carga_csv_cancelada.is_set():
+            CTkMessagebox(title="Carga cancelada", message="No se agregó ningún ingrediente al stock.", icon="info")
+            return
+        if tipo == "error":
+            CTkMessagebox(title="Error", message=f"No se pudo procesar el CSV.\n{dato}", icon="warning")
+            return
+
+        self.stock.agregar_lote(dato[['nombre', 'unidad', 'cantidad']].itertuples(index=False, name=None))
 
         CTkMessagebox(title="Stock Actualizado", message="Ingredientes agregados al stock correctamente.", icon="check")
-        self.actualizar_treeview()   
+
+    def cancelar_carga_csv(self):
+        self._carga_csv_cancelada.set()
 
 # cambiooooooooooooooooooooooo
 
@@ -124,6 +286,7 @@ class AplicacionConPestanas(ctk.CTk):
         if not file_path:
             return
 
+        import pandas as pd
         self.df_csv = pd.read_csv(file_path)
         self.mostrar_dataframe_en_tabla(self.df_csv)
         self.boton_agregar_stock.configure(command=self.agregar_csv_al_stock)
@@ -137,18 +300,66 @@ class AplicacionConPestanas(ctk.CTk):
             self.tabla_csv.heading(col, text=col)
             self.tabla_csv.column(col, width=100, anchor="center")
 
+        from carga_csv import resumen_csv
+        resumen = resumen_csv(df)
+        partes = [f"{resumen['filas']} filas"]
+        if resumen['ingredientes'] is not None:
+            partes.append(f"{resumen['ingredientes']} ingredientes")
+            partes.append(f"{resumen['duplicados']} repetidos")
+            partes.append(f"{resumen['sin_nombre']} sin nombre")
+        if resumen['cantidades_invalidas'] is not None:
+            partes.append(f"{resumen['cantidades_invalidas']} cantidades inválidas")
+        self.label_resumen_csv.configure(text=" · ".join(partes))
+
+        self.frame_paginas_csv.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+        self.tabla_csv.pack(expand=True, fill="both", padx=10, pady=10)
+        self.mostrar_pagina_csv(0)
+
+    def mostrar_pagina_csv(self, pagina):
+        """Reemplaza las filas del Treeview por las de la página indicada (solo esas se leen del DataFrame)."""
+        if self.df_csv is None or self.tabla_csv is None:
+            return
+        from carga_csv import pagina_csv, FILAS_POR_PAGINA
+        total = len(self.df_csv)
+        paginas = max(-(-total // FILAS_POR_PAGINA), 1)
+        self.pagina_actual_csv = min(max(pagina, 0), paginas - 1)
 
-        for _, row in df.iterrows():
-            self.tabla_csv.insert("", "end", values=list(row))
+        self.tabla_csv.delete(*self.tabla_csv.get_children())
+        for valores in pagina_csv(self.df_csv, self.pagina_actual_csv, FILAS_POR_PAGINA):
+            self.tabla_csv.insert("", "end", values=valores)
 
-        self.tabla_csv.pack(expand=True, fill="both", padx=10, pady=10)
+        inicio = self.pagina_actual_csv * FILAS_POR_PAGINA
+        fin = min(inicio + FILAS_POR_PAGINA, total)
+        self.label_pagina_csv.configure(text=f"Filas {inicio + 1 if total else 0}-{fin} de {total}")
+        self.boton_pagina_anterior.configure(state="normal" if self.pagina_actual_csv > 0 else "disabled")
+        self.boton_pagina_siguiente.configure(state="normal" if self.pagina_actual_csv < paginas - 1 else "disabled")
 
     def actualizar_treeview_pedido(self):
-        for item in self.treeview_menu.get_children():
-            self.treeview_menu.delete(item)
+        """Programa la actualización del Treeview del pedido; varios cambios seguidos se aplican juntos."""
+        if self._job_treeview_pedido is None:
+            self._job_treeview_pedido = self.after_idle(self._aplicar_cambios_treeview_pedido)
 
+    def _aplicar_cambios_treeview_pedido(self):
+        self._job_treeview_pedido = None
+        filas = {}
         for menu in self.pedido.menus:
-            self.treeview_menu.insert("", "end", values=(menu.nombre, menu.cantidad, f"${menu.precio:.2f}"))
+            filas[Stock.normalizar_nombre(menu.nombre)] = (menu.nombre, menu.cantidad, f"${menu.precio:.2f}")
+
+        sobrantes = [iid for iid in self._valores_pedido if iid not in filas]
+        if sobrantes:
+            self.treeview_menu.delete(*sobrantes)
+            for iid in sobrantes:
+                del self._valores_pedido[iid]
+
+        for iid, valores in filas.items():
+            anteriores = self._valores_pedido.get(iid)
+            if anteriores == valores:
+                continue
+            if anteriores is None:
+                self.treeview_menu.insert("", "end", iid=iid, values=valores)
+            else:
+                self.treeview_menu.item(iid, values=valores)
+            self._valores_pedido[iid] = valores
             
     def _configurar_pestana_crear_menu(self):
         contenedor = ctk.CTkFrame(self.tab4)
@@ -165,14 +376,22 @@ class AplicacionConPestanas(ctk.CTk):
         self.pdf_frame_carta.pack(expand=True, fill="both", padx=10, pady=10)
 
         self.pdf_viewer_carta = None
+        self._carta_mostrada = None
 
     def generar_y_mostrar_carta_pdf(self):
         try:
-            pdf_path = "carta.pdf"
-            create_menu_pdf(self.menus, pdf_path,
+            from menu_pdf import create_menu_pdf
+            from ctk_pdf_viewer import CTkPDFViewer
+            # solo se previsualiza: la carta va en memoria al visor, sin pasar por carta.pdf
+            contenido = create_menu_pdf(self.menus,
                 titulo_negocio="Restaurante",
                 subtitulo="Carta Primavera 2025",
-                moneda="$")
+                moneda="$",
+                como_bytes=True)
+
+            # si la carta no cambió, el visor actual ya la muestra: no se vuelve a rasterizar
+            if self.pdf_viewer_carta is not None and contenido is self._carta_mostrada:
+                return
             
             if self.pdf_viewer_carta is not None:
                 try:
@@ -182,9 +401,9 @@ class AplicacionConPestanas(ctk.CTk):
                     pass
                 self.pdf_viewer_carta = None
 
-            abs_pdf = os.path.abspath(pdf_path)
-            self.pdf_viewer_carta = CTkPDFViewer(self.pdf_frame_carta, file=abs_pdf)
+            self.pdf_viewer_carta = CTkPDFViewer(self.pdf_frame_carta, file=contenido)
             self.pdf_viewer_carta.pack(expand=True, fill="both")
+            self._carta_mostrada = contenido
 
         except Exception as e:
             CTkMessagebox(title="Error", message=f"No se pudo generar/mostrar la carta.\n{e}", icon="warning")
@@ -202,7 +421,6 @@ class AplicacionConPestanas(ctk.CTk):
         self.pdf_frame_boleta = ctk.CTkFrame(contenedor)
         self.pdf_frame_boleta.pack(expand=True, fill="both", padx=10, pady=10)
         self.pdf_viewer_boleta = None
-        self._boleta_mostrable = False
         #cambiooooooooooooooooooooooo
     def mostrar_boleta(self):
 
@@ -211,13 +429,7 @@ class AplicacionConPestanas(ctk.CTk):
             return
         
         try:
-            pdf_path = os.path.abspath("boleta.pdf")
-            if not os.path.exists(pdf_path):
-                CTkMessagebox(title="Boleta", message="No se encontró el archivo 'boleta.pdf'. Genérelo primero.", icon="warning")
-                # desactivar el flag para evitar futuros intentos accidentales
-                self._boleta_mostrable = False
-                return
-
+            from ctk_pdf_viewer import CTkPDFViewer
             if self.pdf_viewer_boleta is not None:
                 try:
                     self.pdf_viewer_boleta.pack_forget()
@@ -227,7 +439,8 @@ class AplicacionConPestanas(ctk.CTk):
 
                 self.pdf_viewer_boleta = None
 
-            self.pdf_viewer_boleta = CTkPDFViewer(self.pdf_frame_boleta, file=pdf_path)
+            # el PDF llega en memoria desde el spooler; no se relee el archivo archivado
+            self.pdf_viewer_boleta = CTkPDFViewer(self.pdf_frame_boleta, file=self._boleta.pdf)
             self.pdf_viewer_boleta.pack(expand=True, fill="both")
 
         except Exception as e:
@@ -272,6 +485,7 @@ class AplicacionConPestanas(ctk.CTk):
         self.tree.heading("Unidad", text="Unidad")
         self.tree.heading("Cantidad", text="Cantidad")
         self.tree.pack(expand=True, fill="both", padx=10, pady=10)
+        self.actualizar_treeview()
 
         self.boton_generar_menu = ctk.CTkButton(frame_treeview, text="Generar Menú", command=self.generar_menus)
         self.boton_generar_menu.pack(pady=10)
@@ -279,44 +493,19 @@ class AplicacionConPestanas(ctk.CTk):
     def tarjeta_click(self, event, menu):
 
         try:
-            self.stock.cargar_desde_csv()
+            self.stock.refresh_if_stale()
         except Exception:
             pass
 
-        suficiente_stock = True
-        if not self.stock.lista_ingredientes:
-            suficiente_stock = False
-
-        for ingrediente_necesario in menu.ingredientes:
-            encontrado_y_suficiente = False
-            for ingrediente_stock in self.stock.lista_ingredientes:
-                if ingrediente_necesario.nombre.strip().lower() == str(ingrediente_stock.nombre).strip().lower():
-                    try:
-                        if float(ingrediente_stock.cantidad) >= float(ingrediente_necesario.cantidad):
-                            encontrado_y_suficiente = True
-                            break
-                    except Exception:
-                        encontrado_y_suficiente = False
-            if not encontrado_y_suficiente:
-                suficiente_stock = False
-                break
-
-        if suficiente_stock:
-
-            for ingrediente_necesario in menu.ingredientes:
-                for ingrediente_stock in self.stock.lista_ingredientes:
-                    if ingrediente_necesario.nombre.strip().lower() == str(ingrediente_stock.nombre).strip().lower():
-                        try:
-                            ingrediente_stock.cantidad = float(ingrediente_stock.cantidad) - float(ingrediente_necesario.cantidad)
-                        except Exception:
-                            pass
+        cantidad = self.leer_cantidad_menu()
+        if cantidad is None:
+            return
 
-            try:
-                self.stock.actualizar_csv()
-            except Exception:
-                pass
+        faltantes = self.stock.reservar([(menu, cantidad)], motivo=f"pedido {menu.nombre}")
+
+        if not faltantes:
 
-            self.pedido.agregar_menu(menu)
+            self.pedido.agregar_menu(menu, cantidad)
             self.actualizar_treeview_pedido()
             total = self.pedido.calcular_total()
             try:
@@ -324,44 +513,58 @@ class AplicacionConPestanas(ctk.CTk):
             except Exception:
                 pass
         else:
-            CTkMessagebox(title="Stock Insuficiente", message=f"No hay suficientes ingredientes para preparar el menú '{menu.nombre}'.", icon="warning")
+            detalle = ", ".join(faltantes)
+            CTkMessagebox(title="Stock Insuficiente", message=f"No hay suficientes ingredientes para preparar {cantidad} x '{menu.nombre}'.\nFalta: {detalle}", icon="warning")
+
+    def leer_cantidad_menu(self):
+        """Cantidad de porciones a agregar por click (campo 'Cantidad' del pedido)."""
+        texto = self.entry_cantidad_menu.get().strip()
+        if not texto:
+            return 1
+        if texto.isdigit() and int(texto) > 0:
+            return int(texto)
+        CTkMessagebox(title="Error de Validación", message="La cantidad del menú debe ser un entero mayor que 0.", icon="warning")
+        return None
     # cambiooooooooooooooooooooooo
     def cargar_icono_menu(self, ruta_icono):
 
-        if not ruta_icono:
-            raise FileNotFoundError("ruta de icono vacía")
-        path = ruta_icono
-        if not os.path.isabs(path):
-            path = os.path.join(os.path.dirname(__file__), ruta_icono)
-        imagen = Image.open(path).convert('RGBA')
-        # CTkImage acepta PIL Image como primer argumento
-        icono_menu = ctk.CTkImage(imagen, size=(64, 64))
-        return icono_menu
+        # el icono se decodifica una sola vez por proceso (ver CacheIconos)
+        return CacheIconos.compartido().obtener(ruta_icono, (64, 64))
     # cambiooooooooooooooooooooooo
     def generar_menus(self):
-        
+        # la grilla solo crea, actualiza o quita las tarjetas que cambiaron
         try:
-            for child in tarjetas_frame.winfo_children():
-                child.destroy()
-            try:
-                CTkMessagebox(title="Menú generado",message="Se generó el menú exitosamente", icon="check")
-            except Exception:
-                CTkMessagebox(title="Error inesperado", message=f"No se ha podido generar el menú.", icon="warning")
+            self._asegurar_pestana("Pedido")
+            self.grilla_menus.sincronizar(self.menus)
+            self.menus_creados = len(self.menus)
+            CTkMessagebox(title="Menú generado",message="Se generó el menú exitosamente", icon="check")
+        except Exception as e:
+            CTkMessagebox(title="Error inesperado", message=f"No se ha podido generar el menú.\n{e}", icon="warning")
+
+    def actualizar_porciones(self, porciones):
+        """Actualiza el texto de las tarjetas de los menús cuyas porciones cambiaron."""
+        if "Pedido" not in self._pestanas_construidas:
+            # las tarjetas leen las porciones vigentes al crearse
+            return
+        try:
+            self.grilla_menus.actualizar_porciones(porciones)
         except Exception:
             pass
 
-        # usar contador para posiciones y wrap a 4 columnas
-        self.menus_creados = 0
-        max_cols = 4
-        for idx, menu in enumerate(self.menus):
-            try:
-                # crear tarjeta y posicionar en una rejilla
-                fila = idx // max_cols
-                columna = idx % max_cols
-                self.crear_tarjeta(menu, row=fila, column=columna)
-                self.menus_creados += 1
-            except Exception as e:
-                print(f"Error creando tarjeta para {getattr(menu,'nombre',str(menu))}: {e}")
+    def _texto_porciones_menu(self, menu):
+        try:
+            return self._texto_porciones(self.disponibilidad.porciones_de(menu.nombre))
+        except KeyError:
+            # menú que no está en el catálogo compilado por MotorDisponibilidad
+            return ""
+
+    @staticmethod
+    def _texto_porciones(cantidad):
+        if cantidad is None:
+            return "Disponible"
+        if cantidad <= 0:
+            return "Sin stock"
+        return f"Quedan: {cantidad}"
 
     def eliminar_menu(self):
         selecion = self.treeview_menu.selection()
@@ -389,16 +592,24 @@ class AplicacionConPestanas(ctk.CTk):
                 CTkMessagebox(title="Boleta", message="El pedido está vacío. Agrega elementos antes de generar la boleta.", icon="warning")
                 return
 
-            facade = BoletaFacade(self.pedido)
-            resultado = facade.generar_boleta()
-            # mostrar mensaje de éxito
-            CTkMessagebox(title="Boleta", message=resultado, icon="info")
-
-            self._boleta_mostrable = True
-    
+            # la boleta se genera en segundo plano; aquí solo se revisa cuándo termina
+            numero, futuro = self.boletas.encolar(self.pedido)
+            self.after(100, lambda: self._revisar_boleta(numero, futuro))
 
         except Exception as e:
             CTkMessagebox(title="Error Boleta", message=f"No se pudo generar la boleta: {e}", icon="warning")
+
+    def _revisar_boleta(self, numero, futuro):
+        if not futuro.done():
+            self.after(100, lambda: self._revisar_boleta(numero, futuro))
+            return
+        try:
+            self._boleta = futuro.result()
+        except Exception as e:
+            CTkMessagebox(title="Error Boleta", message=f"No se pudo generar la boleta N° {numero}: {e}", icon="warning")
+            return
+        self._boleta_mostrable = True
+        CTkMessagebox(title="Boleta", message=f"Boleta N° {numero} generada y guardada en: {self._boleta.ruta}", icon="info")
         # hasta aca cambiooooooooooooooooooooooo
     def configurar_pestana2(self):
         frame_superior = ctk.CTkFrame(self.tab2)
@@ -407,9 +618,13 @@ class AplicacionConPestanas(ctk.CTk):
         frame_intermedio = ctk.CTkFrame(self.tab2)
         frame_intermedio.pack(side="top", fill="x", padx=10, pady=5)
 
-        global tarjetas_frame
-        tarjetas_frame = ctk.CTkFrame(frame_superior)
-        tarjetas_frame.pack(expand=True, fill="both", padx=10, pady=10)
+        self.grilla_menus = GrillaMenus(
+            frame_superior,
+            al_click=self.tarjeta_click,
+            cargar_icono=self.cargar_icono_menu,
+            texto_porciones=self._texto_porciones_menu,
+        )
+        self.grilla_menus.pack(expand=True, fill="both", padx=10, pady=10)
 
         self.boton_eliminar_menu = ctk.CTkButton(frame_intermedio, text="Eliminar Menú", command=self.eliminar_menu)
         self.boton_eliminar_menu.pack(side="right", padx=10)
@@ -417,6 +632,12 @@ class AplicacionConPestanas(ctk.CTk):
         self.label_total = ctk.CTkLabel(frame_intermedio, text="Total: $0.00", anchor="e", font=("Helvetica", 12, "bold"))
         self.label_total.pack(side="right", padx=10)
 
+        label_cantidad_menu = ctk.CTkLabel(frame_intermedio, text="Cantidad:")
+        label_cantidad_menu.pack(side="left", padx=(10, 5))
+        self.entry_cantidad_menu = ctk.CTkEntry(frame_intermedio, width=60)
+        self.entry_cantidad_menu.insert(0, "1")
+        self.entry_cantidad_menu.pack(side="left")
+
         frame_inferior = ctk.CTkFrame(self.tab2)
         frame_inferior.pack(side="bottom", fill="both", expand=True, padx=10, pady=10)
 
@@ -429,46 +650,6 @@ class AplicacionConPestanas(ctk.CTk):
         self.boton_generar_boleta=ctk.CTkButton(frame_inferior,text="Generar Boleta",command=self.generar_boleta)
         self.boton_generar_boleta.pack(side="bottom",pady=10)
 
-    def crear_tarjeta(self, menu, row=0, column=0):
-
-        tarjeta = ctk.CTkFrame(
-            tarjetas_frame,
-            corner_radius=10,
-            border_width=1,
-            border_color="#4CAF50",
-            width=64,
-            height=140,
-            fg_color="gray",
-        )
-        tarjeta.grid(row=row, column=column, padx=15, pady=15, sticky="nsew")
-
-        # capturar menu como valor por defecto para evitar problemas en bucles
-        tarjeta.bind("<Button-1>", lambda event, m=menu: self.tarjeta_click(event, m))
-        tarjeta.bind("<Enter>", lambda event: tarjeta.configure(border_color="#FF0000"))
-        tarjeta.bind("<Leave>", lambda event: tarjeta.configure(border_color="#4CAF50"))
-
-        if getattr(menu, "icono_path", None):
-            try:
-                icono = self.cargar_icono_menu(menu.icono_path)
-                imagen_label = ctk.CTkLabel(
-                    tarjeta, image=icono, width=64, height=64, text="", bg_color="transparent"
-                )
-                imagen_label.image = icono
-                imagen_label.pack(anchor="center", pady=5, padx=10)
-                imagen_label.bind("<Button-1>", lambda event, m=menu: self.tarjeta_click(event, m))
-            except Exception as e:
-                print(f"No se pudo cargar la imagen '{menu.icono_path}': {e}")
-
-        texto_label = ctk.CTkLabel(
-            tarjeta,
-            text=f"{menu.nombre}",
-            text_color="black",
-            font=("Helvetica", 12, "bold"),
-            bg_color="transparent",
-        )
-        texto_label.pack(anchor="center", pady=1)
-        texto_label.bind("<Button-1>", lambda event, m=menu: self.tarjeta_click(event, m))
-
     def validar_nombre(self, nombre):
         if re.match(r"^[a-zA-Z\s]+$", nombre):
             return True
@@ -504,12 +685,12 @@ class AplicacionConPestanas(ctk.CTk):
             return
 
         ingrediente = Ingrediente(nombre=nombre, unidad=unidad if unidad else None, cantidad=cantidad_val)
+        self.stock.refresh_if_stale()
         self.stock.agregar_ingrediente(ingrediente)
         CTkMessagebox(title="Ingrediente agregado", message=f"{nombre.capitalize()} agregado al stock.", icon="check")
     
         self.entry_nombre.delete(0, 'end')
         self.entry_cantidad.delete(0, 'end')
-        self.actualizar_treeview()
 
     def eliminar_ingrediente(self):
         
@@ -522,23 +703,13 @@ class AplicacionConPestanas(ctk.CTk):
         if not valores:
             return
         nombre = valores[0]
+        self.stock.refresh_if_stale()
         eliminado = self.stock.eliminar_ingrediente(nombre)
         if eliminado:
             CTkMessagebox(title="Eliminado", message=f"{nombre.capitalize()} eliminado del stock.", icon="info")
         else:
             CTkMessagebox(title="Error", message=f"No se pudo eliminar {nombre}.", icon="warning")
-        self.actualizar_treeview()
-
-    def actualizar_treeview(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
 
-        for ingrediente in self.stock.verificar_stock():
-            try:
-                cantidad_mostrada = ingrediente.cantidad_str()
-            except Exception:
-                cantidad_mostrada = ingrediente.cantidad
-            self.tree.insert("", "end", values=(ingrediente.nombre, ingrediente.unidad if ingrediente.unidad else '', cantidad_mostrada))
 #CAMBIOOOOOOOOOOOOOOOOOOOOOOOO
 if __name__ == "__main__":
     import customtkinter as ctk
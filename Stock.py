@@ -1,22 +1,100 @@
 from Ingrediente import Ingrediente
 import os
 import csv
+import io
+import time
+import atexit
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from bloqueo_archivos import bloquear, desbloquear
 
 
 
 class Stock:
     CSV_FILENAME = os.path.join(os.path.dirname(__file__), "ingredientes_menu.csv")
+    # segundos sin cambios antes de escribir el CSV
+    DEBOUNCE_SEGUNDOS = 0.5
+    # tamaño del journal a partir del cual se vuelve a escribir el CSV completo
+    COMPACTAR_BYTES = 256 * 1024
+    # margen para errores de redondeo al sumar cantidades decimales (0.2 * 34 != 6.8)
+    TOLERANCIA = 1e-9
+    JOURNAL_CAMPOS = ['fecha', 'operacion', 'nombre', 'unidad', 'delta', 'cantidad', 'motivo']
 
     def __init__(self):
         self.lista_ingredientes = []
+        # nombre normalizado -> Ingrediente (mismo objeto que en lista_ingredientes)
+        self._indice = {}
+
+        self._lock = threading.RLock()
+        self._sucio = False
+        self._ultimo_cambio = 0.0
+        self._timer = None
+        self._journal = None
+        self._bytes_journal = 0
+        # (mtime, tamaño) del CSV y (inodo, tamaño) del journal la última vez que los leímos o escribimos
+        self._firma_csv = None
+        self._firma_journal = None
+        # sha256 del contenido del CSV cargado: identifica la versión sobre la que se anota el journal
+        self._huella_csv = None
+        # lock del sistema operativo compartido con otros procesos (ver _bloqueo_archivos)
+        self._archivo_lock = None
+        self._nivel_bloqueo = 0
+        self._suscriptores = []
+        atexit.register(self.flush)
 
         self.cargar_desde_csv()
 
+    @staticmethod
+    def normalizar_nombre(nombre) -> str:
+        return str(nombre).strip().lower()
+
+    def buscar(self, nombre):
+        """Retorna el ingrediente con ese nombre (sin importar mayúsculas/espacios) o None."""
+        return self._indice.get(self.normalizar_nombre(nombre))
+
+    def contiene(self, nombre) -> bool:
+        return self.normalizar_nombre(nombre) in self._indice
+
+    def cantidad_de(self, nombre) -> float:
+        """Cantidad disponible del ingrediente, 0 si no existe."""
+        ing = self.buscar(nombre)
+        if ing is None:
+            return 0.0
+        try:
+            return float(ing.cantidad)
+        except Exception:
+            return 0.0
+
+    def suscribir(self, callback):
+        """Registra callback(nombres) que se llama después de cada cambio del stock.
+
+        nombres es el conjunto de nombres normalizados que cambiaron, o None si
+        se recargó todo el stock.
+        """
+        self._suscriptores.append(callback)
 
-    def agregar_ingrediente(self, ingrediente: Ingrediente):
-        nombre_nuevo = ingrediente.nombre.strip().lower()
+    def _notificar(self, nombres):
+        for callback in list(self._suscriptores):
+            try:
+                callback(nombres)
+            except Exception as e:
+                print(f"Error notificando cambio de stock: {e}")
+
+    def _reconstruir_indice(self):
+        self._indice = {}
         for ing in self.lista_ingredientes:
-            if str(ing.nombre).strip().lower() == nombre_nuevo:
+            self._indice.setdefault(self.normalizar_nombre(ing.nombre), ing)
+
+    def agregar_ingrediente(self, ingrediente: Ingrediente, motivo: str = "ingreso"):
+        with self._bloqueo_archivos():
+            # partir de lo que otros procesos ya escribieron, no de una copia vieja
+            self.refresh_if_stale()
+            ing = self.buscar(ingrediente.nombre)
+            if ing is not None:
+                anterior = ing.cantidad
                 try:
                     ing.cantidad = float(ing.cantidad) + float(ingrediente.cantidad)
                 except Exception:
@@ -25,72 +103,449 @@ class Stock:
                         ing.cantidad = float(ingrediente.cantidad)
                     except Exception:
                         pass
-                self.actualizar_csv()
+                self._registrar('agregar', ing, float(ing.cantidad) - float(anterior), motivo)
                 return True
 
-        try:
-            ingrediente.nombre = ingrediente.nombre.strip().capitalize()
-        except Exception:
-            pass
-        self.lista_ingredientes.append(ingrediente)
-        self.actualizar_csv()
-        return True
-
-    def eliminar_ingrediente(self, nombre_ingrediente: str):
-        antes = len(self.lista_ingredientes)
-        self.lista_ingredientes = [i for i in self.lista_ingredientes if i.nombre != nombre_ingrediente]
-        if len(self.lista_ingredientes) < antes:
-            self.actualizar_csv()
+            try:
+                ingrediente.nombre = ingrediente.nombre.strip().capitalize()
+            except Exception:
+                pass
+            self.lista_ingredientes.append(ingrediente)
+            self._indice[self.normalizar_nombre(ingrediente.nombre)] = ingrediente
+            self._registrar('agregar', ingrediente, ingrediente.cantidad, motivo)
+            return True
+
+    def agregar_lote(self, filas, motivo: str = "carga csv"):
+        """Suma muchas filas (nombre, unidad, cantidad) al stock con una sola escritura al journal."""
+        registros = []
+        with self._bloqueo_archivos():
+            self.refresh_if_stale()
+            for nombre, unidad, cantidad in filas:
+                clave = self.normalizar_nombre(nombre)
+                cantidad = float(cantidad)
+                ing = self._indice.get(clave)
+                if ing is None:
+                    ing = Ingrediente(nombre=str(nombre).strip().capitalize(), unidad=unidad or None, cantidad=cantidad)
+                    self.lista_ingredientes.append(ing)
+                    self._indice[clave] = ing
+                else:
+                    ing.cantidad = float(ing.cantidad) + cantidad
+                registros.append(('agregar', ing, cantidad, motivo))
+            if registros:
+                self._registrar_lote(registros)
+        return len(registros)
+
+    def eliminar_ingrediente(self, nombre_ingrediente: str, motivo: str = "eliminado"):
+        with self._bloqueo_archivos():
+            self.refresh_if_stale()
+            ing = self._indice.pop(self.normalizar_nombre(nombre_ingrediente), None)
+            if ing is None:
+                return False
+            self.lista_ingredientes = [i for i in self.lista_ingredientes if i is not ing]
+            self._registrar('eliminar', ing, -float(ing.cantidad), motivo)
+            return True
+
+    def ajustar(self, nombre_ingrediente, delta, motivo: str = "ajuste"):
+        """Suma (o resta, si delta es negativo) una cantidad a un ingrediente existente."""
+        with self._bloqueo_archivos():
+            self.refresh_if_stale()
+            ing = self.buscar(nombre_ingrediente)
+            if ing is None:
+                return False
+            ing.cantidad = float(ing.cantidad) + float(delta)
+            self._registrar('ajustar', ing, float(delta), motivo)
             return True
-        return False
+
+    def reservar(self, items, motivo: str = "pedido"):
+        """Descuenta del stock un pedido completo, todo o nada.
+
+        items es una lista de pares (menu, cantidad). Se suman los ingredientes
+        de todas las líneas y se verifican de una vez; si algo falta no se
+        descuenta nada. Retorna {nombre_ingrediente: cantidad_faltante}, vacío
+        si la reserva se aplicó.
+        """
+        necesarios = {}
+        nombres = {}
+        for menu, cantidad in items:
+            for req in menu.ingredientes:
+                clave = self.normalizar_nombre(req.nombre)
+                necesarios[clave] = necesarios.get(clave, 0.0) + float(req.cantidad) * float(cantidad)
+                nombres.setdefault(clave, req.nombre)
+
+        with self._bloqueo_archivos():
+            self.refresh_if_stale()
+            faltantes = {}
+            for clave, cantidad in necesarios.items():
+                ing = self._indice.get(clave)
+                disponible = float(ing.cantidad) if ing is not None else 0.0
+                if disponible + self.TOLERANCIA < cantidad:
+                    faltantes[ing.nombre if ing is not None else nombres[clave]] = round(cantidad - disponible, 6)
+            if faltantes:
+                return faltantes
+
+            registros = []
+            for clave, cantidad in necesarios.items():
+                ing = self._indice[clave]
+                ing.cantidad = float(ing.cantidad) - cantidad
+                registros.append(('ajustar', ing, -cantidad, motivo))
+            if registros:
+                self._registrar_lote(registros)
+        return {}
 
     def verificar_stock(self):
         return self.lista_ingredientes
 
     def actualizar_stock(self, nombre_ingrediente, nueva_cantidad):
-        for ing in self.lista_ingredientes:
-            if ing.nombre == nombre_ingrediente:
-                ing.cantidad = float(nueva_cantidad)
-                self.actualizar_csv()
-                return True
-        return False
+        with self._bloqueo_archivos():
+            self.refresh_if_stale()
+            ing = self.buscar(nombre_ingrediente)
+            if ing is None:
+                return False
+            anterior = float(ing.cantidad)
+            ing.cantidad = float(nueva_cantidad)
+            self._registrar('fijar', ing, ing.cantidad - anterior, "actualizacion")
+            return True
 
     def obtener_elementos_menu(self):
         return self.lista_ingredientes
 
+    def ruta_lock(self) -> str:
+        return os.path.splitext(self.CSV_FILENAME)[0] + ".lock"
+
+    @contextmanager
+    def _bloqueo_archivos(self):
+        """Excluye a los demás hilos y procesos que usan los mismos archivos.
+
+        Toma el RLock del proceso y un lock del sistema operativo sobre el
+        archivo .lock, así leer, comprobar, recargar y agregar al journal
+        ocurre sin que otra caja escriba entre medio. Es reentrante dentro
+        del mismo hilo.
+        """
+        with self._lock:
+            if self._nivel_bloqueo == 0:
+                self._archivo_lock = bloquear(self.ruta_lock())
+            self._nivel_bloqueo += 1
+            try:
+                yield
+            finally:
+                self._nivel_bloqueo -= 1
+                if self._nivel_bloqueo == 0:
+                    archivo, self._archivo_lock = self._archivo_lock, None
+                    desbloquear(archivo)
+
+    def _leer_firma_csv(self):
+        try:
+            st = os.stat(self.CSV_FILENAME)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _leer_firma_journal(self):
+        try:
+            st = os.stat(self.ruta_journal())
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size)
+
+    def esta_desactualizado(self) -> bool:
+        """True si otro proceso modificó el CSV o el journal desde la última lectura/escritura."""
+        if self._leer_firma_csv() != self._firma_csv:
+            return True
+        # el inodo distingue un journal nuevo (otro proceso compactó) aunque tenga el mismo tamaño
+        return self._leer_firma_journal() != self._firma_journal
+
+    def refresh_if_stale(self) -> bool:
+        """Recarga el stock solo si los archivos cambiaron por fuera. Retorna True si recargó."""
+        if not self.esta_desactualizado():
+            return False
+        with self._bloqueo_archivos():
+            if not self.esta_desactualizado():
+                return False
+            self.cargar_desde_csv()
+            return True
+
     def cargar_desde_csv(self):
+        with self._bloqueo_archivos():
+            self._cerrar_journal()
+            self._cargar_archivos()
+            self._notificar(None)
+
+    def _cargar_archivos(self):
         self.lista_ingredientes = []
-        if not os.path.exists(self.CSV_FILENAME):
+        self._indice = {}
+        self._firma_csv = self._leer_firma_csv()
+        try:
+            with open(self.CSV_FILENAME, 'rb') as f:
+                datos = f.read()
+        except FileNotFoundError:
+            self._firma_csv = None
+            self._huella_csv = None
+            self._aplicar_journal()
             return
-        
+
         try:
-            with open(self.CSV_FILENAME, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    nombre = row.get('nombre') or row.get('Name') or row.get('Nombre') or row.get('nombre_ingrediente')
-                    unidad = row.get('unidad') or row.get('Unidad') or ''
-                    cantidad = row.get('cantidad') or row.get('Cantidad') or 0
-                    if nombre:
+            reader = csv.DictReader(io.StringIO(datos.decode('utf-8'), newline=''))
+            for row in reader:
+                nombre = row.get('nombre') or row.get('Name') or row.get('Nombre') or row.get('nombre_ingrediente')
+                unidad = row.get('unidad') or row.get('Unidad') or ''
+                cantidad = row.get('cantidad') or row.get('Cantidad') or 0
+                if nombre:
+                    try:
+                        ing = Ingrediente(nombre=str(nombre), unidad=str(unidad) if unidad else None, cantidad=float(cantidad))
+                    except Exception:
+                        
                         try:
                             ing = Ingrediente(nombre=str(nombre), unidad=str(unidad) if unidad else None, cantidad=float(cantidad))
                         except Exception:
-                            
-                            try:
-                                ing = Ingrediente(nombre=str(nombre), unidad=str(unidad) if unidad else None, cantidad=float(cantidad))
-                            except Exception:
-                                ing = Ingrediente(nombre=str(nombre), unidad=str(unidad) if unidad else None, cantidad=0)
-                        self.lista_ingredientes.append(ing)
+                            ing = Ingrediente(nombre=str(nombre), unidad=str(unidad) if unidad else None, cantidad=0)
+                    self.lista_ingredientes.append(ing)
         except Exception:   
             pass
+        self._reconstruir_indice()
+        self._huella_csv = _huella(datos)
+        self._aplicar_journal()
+
+    def ruta_journal(self) -> str:
+        return os.path.splitext(self.CSV_FILENAME)[0] + ".journal"
+
+    def _registrar(self, operacion, ing, delta, motivo):
+        self._registrar_lote([(operacion, ing, delta, motivo)])
+
+    def _registrar_lote(self, registros):
+        """Agrega los cambios al final del journal en una sola escritura.
+
+        Cada registro guarda el delta (para auditoría) y la cantidad resultante,
+        así volver a aplicar el journal sobre un CSV que ya lo incluye no cambia nada.
+        Quien llama tiene tomado _bloqueo_archivos desde antes de leer el stock.
+        """
+        cambiados = {self.normalizar_nombre(ing.nombre) for _, ing, _, _ in registros}
+        fecha = datetime.now().isoformat(timespec='seconds')
+        lineas = []
+        for operacion, ing, delta, motivo in registros:
+            lineas.append([fecha, operacion, ing.nombre, ing.unidad or '',
+                           _num(delta), _num(ing.cantidad), motivo or ''])
+        with self._bloqueo_archivos():
+            try:
+                self._anotar(lineas)
+            except Exception as e:
+                # sin journal el cambio solo está en memoria: se escribe el CSV completo ya
+                self._cerrar_journal()
+                try:
+                    self._compactar()
+                except Exception:
+                    print(f"Error guardando el stock: {e}")
+                    self.actualizar_csv()
+            else:
+                if self._bytes_journal >= self.COMPACTAR_BYTES:
+                    self.actualizar_csv()
+        self._notificar(cambiados)
+
+    def _anotar(self, lineas):
+        """Escribe filas al final del journal; lo crea con su encabezado si no existe."""
+        texto = io.StringIO()
+        if self._journal is None:
+            ruta = self.ruta_journal()
+            try:
+                # O_EXCL: solo quien crea el archivo escribe el encabezado y la fila 'base'
+                fd = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+            except FileExistsError:
+                self._journal = open(ruta, 'a', newline='', encoding='utf-8')
+            else:
+                self._journal = os.fdopen(fd, 'a', newline='', encoding='utf-8')
+                csv.writer(texto).writerow(self.JOURNAL_CAMPOS)
+                # primera fila: la versión del CSV (por contenido) sobre la que se anotan estos cambios
+                fecha = datetime.now().isoformat(timespec='seconds')
+                csv.writer(texto).writerow([fecha, 'base', '', '', '', '', self._huella_csv or ''])
+        csv.writer(texto).writerows(lineas)
+        self._journal.write(texto.getvalue())
+        self._journal.flush()
+        # con el lock tomado nadie más escribió: la firma en disco es la de este proceso
+        self._firma_journal = self._leer_firma_journal()
+        self._bytes_journal = self._firma_journal[1] if self._firma_journal else 0
+
+    def _aplicar_journal(self):
+        ruta = self.ruta_journal()
+        self._firma_journal = self._leer_firma_journal()
+        self._bytes_journal = self._firma_journal[1] if self._firma_journal else 0
+        if self._firma_journal is None:
+            return
+        try:
+            with open(ruta, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                filas = list(reader)
+                campos = reader.fieldnames
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"Error leyendo el journal de stock '{ruta}': {e}")
+            return
+
+        if campos != self.JOURNAL_CAMPOS:
+            self._apartar_journal("no empieza con el encabezado esperado")
+            return
+        bases = [fila.get('motivo') or '' for fila in filas if fila.get('operacion') == 'base']
+        huella = self._huella_csv or ''
+        if bases and bases[0] != huella:
+            if any(f.get('operacion') == 'compactado' and f.get('motivo') == huella for f in filas):
+                # un proceso se cortó entre escribir el CSV y archivar el journal: ya está incluido
+                self._archivar_journal()
+                return
+            # el CSV se editó por fuera después de anotar el journal: esa versión manda
+            self._apartar_journal("se anotó sobre otra versión del CSV (¿se editó por fuera?)")
+            return
+
+        for row in filas:
+            if row.get('operacion') in ('base', 'compactado'):
+                continue
+            nombre = row.get('nombre')
+            if not nombre:
+                continue
+            clave = self.normalizar_nombre(nombre)
+            if row.get('operacion') == 'eliminar':
+                ing = self._indice.pop(clave, None)
+                if ing is not None:
+                    self.lista_ingredientes.remove(ing)
+                continue
+            try:
+                cantidad = float(row.get('cantidad') or 0)
+            except ValueError:
+                continue
+            ing = self._indice.get(clave)
+            if ing is None:
+                ing = Ingrediente(nombre=nombre, unidad=row.get('unidad') or None, cantidad=cantidad)
+                self.lista_ingredientes.append(ing)
+                self._indice[clave] = ing
+            else:
+                ing.cantidad = cantidad
+        if self._bytes_journal >= self.COMPACTAR_BYTES:
+            self.actualizar_csv()
+
+    def _apartar_journal(self, motivo):
+        """Archiva sin aplicar un journal que no corresponde al CSV, avisando dónde quedó."""
+        destino = self._archivar_journal()
+        print(f"Error: el journal de stock {motivo}; no se aplicó y se guardó en '{destino}'.")
+
+    def _cerrar_journal(self):
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception:
+                pass
+            self._journal = None
+
+    def _compactar(self):
+        """Escribe el CSV con el estado actual y archiva el journal que ya quedó incluido."""
+        datos = self._contenido_csv()
+        huella = _huella(datos)
+        if self._leer_firma_journal() is not None:
+            try:
+                # si el proceso se corta entre escribir el CSV y archivar el journal,
+                # al cargar esta fila indica que el journal ya está incluido en el CSV
+                self._anotar([[datetime.now().isoformat(timespec='seconds'), 'compactado', '', '', '', '', huella]])
+            except Exception:
+                self._cerrar_journal()
+        self._escribir_csv(datos)
+        self._firma_csv = self._leer_firma_csv()
+        self._huella_csv = huella
+        self._archivar_journal()
+
+    def _archivar_journal(self):
+        """Mueve el journal a un archivo de auditoría con fecha y retorna esa ruta.
+
+        Cada tanda queda en su propio archivo (ingredientes_menu.journal.AAAAMMDD-HHMMSS-ffffff),
+        así el historial de movimientos se conserva completo.
+        """
+        self._cerrar_journal()
+        ruta = self.ruta_journal()
+        destino = f"{ruta}.{datetime.now():%Y%m%d-%H%M%S-%f}"
+        while os.path.exists(destino):
+            destino += "_"
+        try:
+            os.replace(ruta, destino)
+        except FileNotFoundError:
+            # no había journal, u otro proceso ya lo archivó
+            pass
+        self._firma_journal = None
+        self._bytes_journal = 0
+        return destino
 
     def actualizar_csv(self):
+        """Pide reescribir el CSV completo. La escritura real se agrupa y la hace flush()."""
+        with self._lock:
+            self._sucio = True
+            self._ultimo_cambio = time.monotonic()
+            if self._timer is None:
+                self._programar_flush(self.DEBOUNCE_SEGUNDOS)
+
+    def _programar_flush(self, espera):
+        self._timer = threading.Timer(espera, self._flush_diferido)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_diferido(self):
+        with self._lock:
+            self._timer = None
+            if not self._sucio:
+                return
+            restante = self._ultimo_cambio + self.DEBOUNCE_SEGUNDOS - time.monotonic()
+            if restante > 0:
+                # hubo cambios después de programar el timer: seguir esperando
+                self._programar_flush(restante)
+                return
+        self.flush()
+
+    def flush(self):
+        """Incorpora ahora al CSV todo lo anotado en el journal (se llama también al cerrar)."""
+        with self._bloqueo_archivos():
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._sucio and self._leer_firma_journal() is None:
+                return
+            # lo que agregaron otros procesos se lee antes, para que la compactación lo incluya
+            self.refresh_if_stale()
+            try:
+                self._compactar()
+                self._sucio = False
+            except Exception as e:
+                print(f"Error guardando el stock: {e}")
+
+    def _contenido_csv(self) -> bytes:
+        texto = io.StringIO()
+        fieldnames = ['nombre', 'unidad', 'cantidad']
+        writer = csv.DictWriter(texto, fieldnames=fieldnames)
+        writer.writeheader()
+        for ing in self.lista_ingredientes:
+            cantidad_para_csv = ing.cantidad_str() if hasattr(ing, 'cantidad_str') else ing.cantidad
+            writer.writerow({'nombre': ing.nombre, 'unidad': ing.unidad if ing.unidad else '', 'cantidad': cantidad_para_csv})
+        return texto.getvalue().encode('utf-8')
+
+    def _escribir_csv(self, datos: bytes):
+        # se escribe a un temporal en el mismo directorio y se reemplaza de forma atómica,
+        # así nunca queda un CSV a medio escribir
+        directorio = os.path.dirname(os.path.abspath(self.CSV_FILENAME))
+        fd, tmp_path = tempfile.mkstemp(prefix=".ingredientes_", suffix=".tmp", dir=directorio)
         try:
-            with open(self.CSV_FILENAME, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['nombre', 'unidad', 'cantidad']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for ing in self.lista_ingredientes:
-                    cantidad_para_csv = ing.cantidad_str() if hasattr(ing, 'cantidad_str') else ing.cantidad
-                    writer.writerow({'nombre': ing.nombre, 'unidad': ing.unidad if ing.unidad else '', 'cantidad': cantidad_para_csv})
+            with os.fdopen(fd, 'wb') as csvfile:
+                csvfile.write(datos)
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+            os.replace(tmp_path, self.CSV_FILENAME)
         except Exception:
-            pass
\ No newline at end of file
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def _huella(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()
+
+
+def _num(valor) -> str:
+    try:
+        val = float(valor)
+    except Exception:
+        return str(valor)
+    if val.is_integer():
+        return str(int(val))
+    return repr(round(val, 6))
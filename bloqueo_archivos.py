@@ -0,0 +1,54 @@
+# bloqueo_archivos.py
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def bloquear(ruta: str):
+    """Abre ruta y toma un lock exclusivo sobre él, compartido con otros procesos.
+
+    Espera hasta obtenerlo. Retorna el archivo abierto, que se suelta con desbloquear().
+    """
+    archivo = open(ruta, 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        else:
+            archivo.seek(0)
+            while True:
+                try:
+                    # LK_LOCK se rinde después de ~10 s; se insiste hasta obtenerlo
+                    msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+    except BaseException:
+        archivo.close()
+        raise
+    return archivo
+
+
+def desbloquear(archivo) -> None:
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        archivo.close()
+
+
+@contextmanager
+def bloqueo_archivo(ruta: str):
+    """with bloqueo_archivo(ruta): ... excluye a los demás procesos que bloquean la misma ruta."""
+    archivo = bloquear(ruta)
+    try:
+        yield
+    finally:
+        desbloquear(archivo)
@@ -0,0 +1,87 @@
+# cache_iconos.py
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+import customtkinter as ctk
+from PIL import Image
+
+
+class CacheIconos:
+    """Iconos decodificados una sola vez por proceso, con descarte LRU.
+
+    La clave es (ruta absoluta, tamaño). Las imágenes PIL se pueden decodificar
+    en segundo plano con precargar(); los CTkImage se crean siempre en el hilo
+    de Tk, la primera vez que se piden con obtener().
+    """
+
+    MAX_ICONOS = 256
+    DIRECTORIO_BASE = os.path.dirname(__file__)
+
+    _compartido: Optional["CacheIconos"] = None
+
+    def __init__(self, max_iconos: int = MAX_ICONOS, directorio_base: str = DIRECTORIO_BASE):
+        self.max_iconos = max_iconos
+        self.directorio_base = directorio_base
+        self._lock = threading.Lock()
+        self._imagenes: "OrderedDict[Tuple[str, Tuple[int, int]], Image.Image]" = OrderedDict()
+        self._iconos: "OrderedDict[Tuple[str, Tuple[int, int]], ctk.CTkImage]" = OrderedDict()
+
+    @classmethod
+    def compartido(cls) -> "CacheIconos":
+        if cls._compartido is None:
+            cls._compartido = cls()
+        return cls._compartido
+
+    def _clave(self, ruta_icono: str, tamano: Tuple[int, int]):
+        if not ruta_icono:
+            raise FileNotFoundError("ruta de icono vacía")
+        path = ruta_icono
+        if not os.path.isabs(path):
+            path = os.path.join(self.directorio_base, ruta_icono)
+        return os.path.normpath(path), tuple(tamano)
+
+    def _guardar(self, cache: OrderedDict, clave, valor) -> None:
+        cache[clave] = valor
+        cache.move_to_end(clave)
+        while len(cache) > self.max_iconos:
+            cache.popitem(last=False)
+
+    def _imagen(self, clave) -> Image.Image:
+        with self._lock:
+            imagen = self._imagenes.get(clave)
+            if imagen is not None:
+                self._imagenes.move_to_end(clave)
+                return imagen
+        # se guarda sin redimensionar: CTkImage escala según el factor de la pantalla
+        with Image.open(clave[0]) as original:
+            imagen = original.convert('RGBA')
+        with self._lock:
+            self._guardar(self._imagenes, clave, imagen)
+        return imagen
+
+    def obtener(self, ruta_icono: str, tamano: Tuple[int, int] = (64, 64)) -> ctk.CTkImage:
+        """CTkImage del icono; llamar solo desde el hilo de Tk."""
+        clave = self._clave(ruta_icono, tamano)
+        icono = self._iconos.get(clave)
+        if icono is not None:
+            self._iconos.move_to_end(clave)
+            return icono
+        icono = ctk.CTkImage(self._imagen(clave), size=tamano)
+        self._guardar(self._iconos, clave, icono)
+        return icono
+
+    def precargar(self, rutas: Iterable[str], tamano: Tuple[int, int] = (64, 64)) -> threading.Thread:
+        """Decodifica los iconos en un hilo aparte; los que fallan se ignoran aquí y se informan al pedirlos."""
+        rutas = [r for r in rutas if r]
+
+        def trabajo():
+            for ruta in rutas:
+                try:
+                    self._imagen(self._clave(ruta, tamano))
+                except (OSError, ValueError):
+                    pass
+
+        hilo = threading.Thread(target=trabajo, name="precarga-iconos", daemon=True)
+        hilo.start()
+        return hilo
@@ -0,0 +1,91 @@
+# carga_csv.py
+import numpy as np
+import pandas as pd
+
+FILAS_POR_BLOQUE = 20000
+FILAS_POR_PAGINA = 200
+
+
+class CargaCancelada(Exception):
+    pass
+
+
+def agrupar_ingredientes(df: pd.DataFrame, progreso=None, cancelado=None) -> pd.DataFrame:
+    """Agrupa las filas del CSV por nombre normalizado sumando las cantidades.
+
+    Procesa el DataFrame por bloques para poder informar avance (progreso(fraccion))
+    y detenerse si cancelado() retorna True. Las filas sin nombre o con cantidad
+    no numérica o negativa se descartan (las mismas que resumen_csv cuenta como
+    inválidas). Retorna un DataFrame con columnas
+    nombre, unidad, cantidad (una fila por ingrediente).
+    """
+    total = len(df)
+    parciales = []
+    for inicio in range(0, total, FILAS_POR_BLOQUE):
+        if cancelado is not None and cancelado():
+            raise CargaCancelada()
+
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+        nombres = bloque['nombre'].astype(str).str.strip()
+        cantidades = pd.to_numeric(bloque['cantidad'], errors='coerce')
+        if 'unidad' in bloque.columns:
+            unidades = bloque['unidad'].fillna('').astype(str).str.strip()
+        else:
+            unidades = pd.Series('', index=bloque.index)
+
+        validas = bloque['nombre'].notna() & (nombres != '') & cantidades.notna() & (cantidades >= 0)
+        parcial = pd.DataFrame({
+            'clave': nombres[validas].str.lower(),
+            'nombre': nombres[validas],
+            'unidad': unidades[validas],
+            'cantidad': cantidades[validas].astype(float),
+        })
+        parciales.append(
+            parcial.groupby('clave', sort=False).agg(nombre=('nombre', 'first'), unidad=('unidad', 'first'), cantidad=('cantidad', 'sum'))
+        )
+
+        if progreso is not None:
+            progreso(min(inicio + FILAS_POR_BLOQUE, total) / total)
+
+    if not parciales:
+        return pd.DataFrame(columns=['nombre', 'unidad', 'cantidad'])
+
+    agrupado = pd.concat(parciales).groupby(level=0, sort=False).agg(nombre=('nombre', 'first'), unidad=('unidad', 'first'), cantidad=('cantidad', 'sum'))
+    return agrupado.reset_index(drop=True)
+
+
+def resumen_csv(df: pd.DataFrame) -> dict:
+    """Resumen vectorizado del CSV para mostrar antes de cargarlo al stock.
+
+    Retorna filas, ingredientes (nombres distintos), duplicados (filas cuyo
+    nombre normalizado ya apareció antes), sin_nombre y cantidades_invalidas
+    (no numéricas o negativas). Las claves que requieren una columna ausente
+    quedan en None.
+    """
+    resumen = {'filas': len(df), 'ingredientes': None, 'duplicados': None, 'sin_nombre': None, 'cantidades_invalidas': None}
+    if 'nombre' in df.columns:
+        # se normalizan solo los valores distintos y se vuelve a las filas por código
+        codigos, unicos = pd.factorize(df['nombre'])
+        claves_unicas = pd.Series(unicos).astype(str).str.strip().str.lower()
+        codigos_clave, _ = pd.factorize(claves_unicas)
+        codigos_clave = np.where(claves_unicas.to_numpy() == '', -1, codigos_clave)
+        por_fila = np.where(codigos >= 0, codigos_clave[codigos], -1)
+        validas = por_fila[por_fila >= 0]
+        distintas = np.unique(validas).size
+        resumen['sin_nombre'] = int(len(df) - validas.size)
+        resumen['duplicados'] = int(validas.size - distintas)
+        resumen['ingredientes'] = int(distintas)
+    if 'cantidad' in df.columns:
+        # mismo truco: convertir cada texto distinto una sola vez
+        codigos, unicos = pd.factorize(df['cantidad'])
+        valores = pd.to_numeric(pd.Series(unicos, dtype=object), errors='coerce').to_numpy(dtype=float)
+        # el código -1 (celda vacía) cae en el True agregado al final
+        invalidos = np.append(np.isnan(valores) | (valores < 0), True)
+        resumen['cantidades_invalidas'] = int(invalidos[codigos].sum())
+    return resumen
+
+
+def pagina_csv(df: pd.DataFrame, pagina: int, filas_por_pagina: int) -> list:
+    """Filas de una página como tuplas; solo se materializa ese tramo del DataFrame."""
+    inicio = pagina * filas_por_pagina
+    return list(df.iloc[inicio:inicio + filas_por_pagina].itertuples(index=False, name=None))
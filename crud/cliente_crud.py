@@ -3,9 +3,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from models import Cliente
 from typing import List, Optional
+from database import con_reintentos
 
 class ClienteCRUD:
     # crear cliente
+    @con_reintentos()
     def create_cliente(self, db: Session, nombre: str, correo: Optional[str] = None) -> Cliente:
         """[CREATE] Crea un nuevo cliente."""
         nombre_limpio = nombre.strip().title()
@@ -36,6 +38,7 @@ class ClienteCRUD:
         return db.query(Cliente).order_by(Cliente.nombre).all()
     
     # eliminar cliente por id
+    @con_reintentos()
     def delete_cliente_by_id(self, db: Session, cliente_id: int) -> bool:
         """[DELETE] Elimina un cliente por su ID."""
         cliente = self.get_cliente_by_id(db, cliente_id)
@@ -46,6 +49,7 @@ class ClienteCRUD:
         return True
     
     # actualizar cliente
+    @con_reintentos()
     def update_cliente(self, db: Session, cliente_id: int, nombre: Optional[str] = None, correo: Optional[str] = None) -> Optional[Cliente]:
         """[UPDATE] Actualiza los datos de un cliente."""
         cliente = self.get_cliente_by_id(db, cliente_id)
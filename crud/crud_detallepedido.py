@@ -2,7 +2,7 @@
 from sqlalchemy.orm import Session
 from models import DetallePedido
 from typing import List
-from schemas import DetallePedido
+from database import con_reintentos
 
 class DetallePedidoCRUD:
     # obtener detalles por pedido id
@@ -11,6 +11,7 @@ class DetallePedidoCRUD:
         return db.query(DetallePedido).filter(DetallePedido.pedido_id == pedido_id).all()
     
     # eliminar detalles por pedido id
+    @con_reintentos()
     def delete_detalles_by_pedido_id(self, db: Session, pedido_id: int) -> int:
         """[DELETE] Elimina todos los detalles de un pedido por su ID. Retorna el número de detalles eliminados."""
         detalles = db.query(DetallePedido).filter(DetallePedido.pedido_id == pedido_id).all()
@@ -21,18 +22,16 @@ class DetallePedidoCRUD:
         return count
     
     # crear detalles para un pedido
+    @con_reintentos()
     def create_detalles_for_pedido(self, db: Session, pedido_id: int, detalles_data: List[dict]) -> List[DetallePedido]:
         """[CREATE] Crea detalles para un pedido dado su ID y una lista de datos de detalles."""
         detalles_creados = []
         for detalle_data in detalles_data:
             detalle = DetallePedido(
                 pedido_id=pedido_id,
-                menu_id=detalle_data['menu_id'],
-                cantidad=detalle_data['cantidad'],
+                nombre_menu=detalle_data['nombre_menu'],
                 precio_unitario=detalle_data['precio_unitario'],
-                subtotal=detalle_data['subtotal'],
-                iva=detalle_data['iva'],
-                total=detalle_data['total']
+                cantidad=detalle_data['cantidad']
             )
             db.add(detalle)
             detalles_creados.append(detalle)
@@ -43,6 +42,7 @@ class DetallePedidoCRUD:
     
     # actualizar detalle por id
     
+    @con_reintentos()
     def update_detalle_by_id(self, db: Session, detalle_id: int, cantidad: int) -> DetallePedido:
         """[UPDATE] Actualiza la cantidad de un detalle de pedido por su ID."""
         detalle = db.query(DetallePedido).get(detalle_id)
@@ -59,6 +59,7 @@ class DetallePedidoCRUD:
         return db.query(DetallePedido).get(detalle_id)
     
     # eliminar detalle por id
+    @con_reintentos()
     def delete_detalle_by_id(self, db: Session, detalle_id: int) -> bool:
         """[DELETE] Elimina un detalle de pedido por su ID."""
         detalle = db.query(DetallePedido).get(detalle_id)
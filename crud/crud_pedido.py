@@ -1,12 +1,16 @@
 #crud pedido
 from sqlalchemy.orm import Session
-from models import Pedido
+from models import Pedido, DetallePedido
 from schemas import PedidoCreate, PedidoUpdate
+from database import con_reintentos
 from typing import List, Optional
 
-# Crear un nuevo pedido
+# Crear un nuevo pedido (con sus detalles, en una sola transacción)
+@con_reintentos()
 def create_pedido(db: Session, pedido: PedidoCreate) -> Pedido:
-    db_pedido = Pedido(**pedido.dict())
+    datos = pedido.model_dump(exclude={"detalles"})
+    detalles = [DetallePedido(**detalle.model_dump()) for detalle in pedido.detalles]
+    db_pedido = Pedido(**datos, detalles=detalles)
     db.add(db_pedido)
     db.commit()
     db.refresh(db_pedido)
@@ -20,20 +24,22 @@ def get_pedidos(db: Session, skip: int = 0, limit: int = 100) -> List[Pedido]:
     return db.query(Pedido).offset(skip).limit(limit).all()
 
 # Actualizar un pedido existente
+@con_reintentos()
 def update_pedido(db: Session, pedido_id: int, pedido_update: PedidoUpdate) -> Optional[Pedido]:
     db_pedido = db.query(Pedido).filter(Pedido.id == pedido_id).first()
     if db_pedido:
-        for key, value in pedido_update.dict(exclude_unset=True).items():
+        for key, value in pedido_update.model_dump(exclude_unset=True).items():
             setattr(db_pedido, key, value)
         db.commit()
         db.refresh(db_pedido)
     return db_pedido
 
 # Eliminar un pedido por su ID
+@con_reintentos()
 def delete_pedido(db: Session, pedido_id: int) -> Optional[Pedido]:
     db_pedido = db.query(Pedido).filter(Pedido.id == pedido_id).first()
     if db_pedido:
         db.delete(db_pedido)
         db.commit()
     return db_pedido
-        
\ No newline at end of file
+
@@ -1,12 +1,16 @@
 # crud/ingrediente_crud.py
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models import Ingrediente 
 from typing import List, Optional, Dict, Any
+from database import con_reintentos
+from sqlalchemy import func
 import pandas as pd
 
 class IngredienteCRUD:
     # crear ingrediente
+    @con_reintentos()
     def create_ingrediente(self, db: Session, nombre: str, unidad: Optional[str], cantidad_stock: float) -> Ingrediente:
         """[CREATE] Crea un nuevo ingrediente."""
         nombre_limpio = nombre.strip().title()
@@ -47,6 +51,7 @@ class IngredienteCRUD:
   
     
     # eliminar ingrediente por id
+    @con_reintentos()
     def delete_ingrediente_by_id(self, db: Session, ingrediente_id: int) -> bool:
         """[DELETE] Elimina un ingrediente por su ID."""
         ingrediente = self.get_ingrediente_by_id(db, ingrediente_id)
@@ -57,6 +62,7 @@ class IngredienteCRUD:
         return True
     
     # actualizar ingrediente
+    @con_reintentos()
     def update_ingrediente(self, db: Session, ingrediente_id: int, nombre: Optional[str] = None, unidad: Optional[str] = None, cantidad_stock: Optional[float] = None) -> Optional[Ingrediente]:
         """[UPDATE] Actualiza los datos de un ingrediente."""
         ingrediente = self.get_ingrediente_by_id(db, ingrediente_id)
@@ -105,4 +111,64 @@ class IngredienteCRUD:
                 print(f"Error inesperado al crear ingrediente '{row['nombre']}': {e}")
         
         return ingredientes_creados
-    
+
+    # cargar ingredientes desde un csv sumando al stock existente (upsert masivo)
+    @con_reintentos()
+    def upsert_ingredientes_from_csv(self, db: Session, file_path: str, chunksize: int = 5000) -> Dict[str, Any]:
+        """[CREATE/UPDATE] Carga un CSV por bloques con INSERT ... ON CONFLICT(nombre) DO UPDATE.
+
+        Los ingredientes que ya existen suman la cantidad al stock. Todo se hace en una
+        sola transacción; las filas inválidas no detienen la carga y se informan en
+        'errores' como {'fila', 'nombre', 'error'}.
+        """
+        stmt = sqlite_insert(Ingrediente)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Ingrediente.nombre],
+            set_={
+                "cantidad_stock": Ingrediente.cantidad_stock + stmt.excluded.cantidad_stock,
+                "unidad": func.coalesce(Ingrediente.unidad, stmt.excluded.unidad),
+            },
+        )
+
+        procesadas = 0
+        errores: List[Dict[str, Any]] = []
+        try:
+            for bloque in pd.read_csv(file_path, chunksize=chunksize):
+                if 'nombre' not in bloque.columns:
+                    raise ValueError("El CSV debe tener la columna 'nombre'.")
+                columna_cantidad = 'cantidad_stock' if 'cantidad_stock' in bloque.columns else 'cantidad'
+                if columna_cantidad in bloque.columns:
+                    cantidades = pd.to_numeric(bloque[columna_cantidad], errors='coerce')
+                else:
+                    cantidades = pd.Series(0.0, index=bloque.index)
+                nombres = bloque['nombre'].fillna('').astype(str).str.strip().str.title()
+                unidades = bloque['unidad'] if 'unidad' in bloque.columns else pd.Series(None, index=bloque.index)
+
+                sin_nombre = nombres == ''
+                sin_cantidad = cantidades.isna() & ~sin_nombre
+                for fila in bloque.index[sin_nombre]:
+                    errores.append({"fila": int(fila) + 1, "nombre": None, "error": "El nombre del ingrediente no puede estar vacío."})
+                for fila in bloque.index[sin_cantidad]:
+                    errores.append({"fila": int(fila) + 1, "nombre": nombres[fila], "error": f"Cantidad inválida: {bloque.at[fila, columna_cantidad]!r}"})
+
+                validas = ~(sin_nombre | sin_cantidad)
+                if not validas.any():
+                    continue
+                agrupado = pd.DataFrame({
+                    'nombre': nombres[validas],
+                    'unidad': unidades[validas].where(unidades[validas].notna(), None),
+                    'cantidad_stock': cantidades[validas].astype(float),
+                }).groupby('nombre', sort=False).agg(unidad=('unidad', 'first'), cantidad_stock=('cantidad_stock', 'sum'))
+
+                registros = [
+                    {"nombre": nombre, "unidad": unidad if isinstance(unidad, str) and unidad else None, "cantidad_stock": cantidad}
+                    for nombre, unidad, cantidad in agrupado.itertuples(name=None)
+                ]
+                db.execute(stmt, registros)
+                procesadas += int(validas.sum())
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return {"procesadas": procesadas, "errores": errores}
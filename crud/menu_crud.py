@@ -1,11 +1,13 @@
 # menu CRUD
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from models import Menu, MenuIngrediente, Ingrediente
 from typing import List, Optional, Dict, Any
+from database import con_reintentos
 
 class MenuCRUD:
     # crear menú
+    @con_reintentos()
     def create_menu(self, db: Session, nombre: str, precio: float, icono_path: Optional[str], ingredientes: List[Dict[str, Any]]) -> Menu:
         """[CREATE] Crea un nuevo menú con sus ingredientes asociados."""
         nombre_limpio = nombre.strip().title()
@@ -16,16 +18,11 @@ class MenuCRUD:
         db.add(menu)
         
         # Asociar ingredientes
-        for item in ingredientes:
-            ingrediente = db.query(Ingrediente).get(item['ingrediente_id'])
-            if not ingrediente:
-                raise ValueError(f"Ingrediente con ID {item['ingrediente_id']} no encontrado.")
-            menu_ingrediente = MenuIngrediente(
-                menu=menu,
-                ingrediente=ingrediente,
-                cantidad_requerida=item['cantidad_requerida']
-            )
-            db.add(menu_ingrediente)
+        try:
+            self._sincronizar_receta(db, menu, ingredientes)
+        except ValueError:
+            db.rollback()
+            raise
         
         try:
             db.commit()
@@ -49,6 +46,7 @@ class MenuCRUD:
         return db.query(Menu).order_by(Menu.nombre).all()
     
     # eliminar menú por nombre
+    @con_reintentos()
     def delete_menu_by_name(self, db: Session, nombre: str) -> bool:
         """[DELETE] Elimina un menú por su nombre."""
         nombre_limpio = nombre.strip().title()
@@ -60,6 +58,7 @@ class MenuCRUD:
         return True
     
     # actualizar menú
+    @con_reintentos()
     def update_menu(self, db: Session, menu_id: int, nombre: Optional[str] = None, precio: Optional[float] = None, icono_path: Optional[str] = None, ingredientes: Optional[List[Dict[str, Any]]] = None) -> Optional[Menu]:
         """[UPDATE] Actualiza los datos de un menú."""
         menu = self.get_menu_by_id(db, menu_id)
@@ -76,21 +75,12 @@ class MenuCRUD:
         if icono_path is not None:
             menu.icono_path = icono_path
         if ingredientes is not None:
-            # Eliminar asociaciones existentes
-            menu.ingredientes_asociados.clear()
-            db.flush()  # Asegura que los cambios se reflejen antes de agregar nuevos
-            
-            # Asociar nuevos ingredientes
-            for item in ingredientes:
-                ingrediente = db.query(Ingrediente).get(item['ingrediente_id'])
-                if not ingrediente:
-                    raise ValueError(f"Ingrediente con ID {item['ingrediente_id']} no encontrado.")
-                menu_ingrediente = MenuIngrediente(
-                    menu=menu,
-                    ingrediente=ingrediente,
-                    cantidad_requerida=item['cantidad_requerida']
-                )
-                db.add(menu_ingrediente)
+            # Solo se tocan las líneas de la receta que cambiaron
+            try:
+                self._sincronizar_receta(db, menu, ingredientes)
+            except ValueError:
+                db.rollback()
+                raise
         
         try:
             db.commit()
@@ -102,7 +92,69 @@ class MenuCRUD:
         except Exception as e:
             db.rollback()
             raise e
-        
-        
-  
-    
+
+    # sincronizar un catálogo completo de menús
+    @con_reintentos()
+    def sync_menus(self, db: Session, menus: List[Dict[str, Any]]) -> List[Menu]:
+        """[CREATE/UPDATE] Crea o actualiza varios menús (por nombre) con sus recetas en una sola transacción.
+
+        Cada elemento es un dict con 'nombre', 'precio', 'icono_path' e 'ingredientes'.
+        Los ingredientes de todo el catálogo se validan con una sola consulta.
+        """
+        ids_catalogo = {item['ingrediente_id'] for datos in menus for item in datos.get('ingredientes', [])}
+        ids_validos = self._ids_existentes(db, ids_catalogo)
+
+        nombres = [datos['nombre'].strip().title() for datos in menus]
+        existentes = {
+            m.nombre: m
+            for m in db.query(Menu).options(selectinload(Menu.ingredientes_asociados)).filter(Menu.nombre.in_(nombres))
+        }
+
+        resultado = []
+        try:
+            for nombre_limpio, datos in zip(nombres, menus):
+                if not nombre_limpio:
+                    raise ValueError("El nombre del menú no puede estar vacío.")
+                menu = existentes.get(nombre_limpio)
+                if menu is None:
+                    menu = Menu(nombre=nombre_limpio)
+                    db.add(menu)
+                    existentes[nombre_limpio] = menu
+                menu.precio = datos.get('precio', menu.precio)
+                menu.icono_path = datos.get('icono_path', menu.icono_path)
+                self._sincronizar_receta(db, menu, datos.get('ingredientes', []), ids_validos)
+                resultado.append(menu)
+            db.commit()
+            return resultado
+        except Exception:
+            db.rollback()
+            raise
+
+    def _ids_existentes(self, db: Session, ids) -> set:
+        if not ids:
+            return set()
+        return {i for (i,) in db.query(Ingrediente.id).filter(Ingrediente.id.in_(list(ids)))}
+
+    def _sincronizar_receta(self, db: Session, menu: Menu, ingredientes: List[Dict[str, Any]], ids_validos: Optional[set] = None) -> None:
+        """Deja la receta del menú igual a 'ingredientes' insertando, actualizando o borrando solo lo que cambió."""
+        requeridos: Dict[int, float] = {}
+        for item in ingredientes:
+            requeridos[item['ingrediente_id']] = item['cantidad_requerida']
+
+        if ids_validos is None:
+            ids_validos = self._ids_existentes(db, requeridos)
+        for ingrediente_id in requeridos:
+            if ingrediente_id not in ids_validos:
+                raise ValueError(f"Ingrediente con ID {ingrediente_id} no encontrado.")
+
+        actuales = {mi.ingrediente_id: mi for mi in menu.ingredientes_asociados}
+        for ingrediente_id, menu_ingrediente in actuales.items():
+            if ingrediente_id not in requeridos:
+                menu.ingredientes_asociados.remove(menu_ingrediente)
+            elif menu_ingrediente.cantidad_requerida != requeridos[ingrediente_id]:
+                menu_ingrediente.cantidad_requerida = requeridos[ingrediente_id]
+        for ingrediente_id, cantidad in requeridos.items():
+            if ingrediente_id not in actuales:
+                menu.ingredientes_asociados.append(
+                    MenuIngrediente(ingrediente_id=ingrediente_id, cantidad_requerida=cantidad)
+                )
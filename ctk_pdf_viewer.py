@@ -1,97 +1,282 @@
-
-
 import customtkinter
 from PIL import Image
 import fitz
-from threading import Thread
+from collections import OrderedDict
+from threading import Event, Thread
+import queue
 import math
-import io
 import os
+from typing import Union
 
 class CTkPDFViewer(customtkinter.CTkScrollableFrame):
     def __init__(self,
                  master: any,
-                 file: str,
+                 file: Union[str, bytes, bytearray, memoryview],
                  page_width: int = 600,
                  page_height: int = 700,
                  page_separation_height: int = 2,
+                 cached_pages: int = 8,
+                 preload_pages: int = 1,
+                 poll_interval: int = 15,
                  **kwargs):
-        
+
         super().__init__(master, **kwargs)
 
         self.page_width = page_width
         self.page_height = page_height
         self.separation = page_separation_height
-        self.pdf_images = []
-        self.labels = []
+        self.cached_pages = cached_pages
+        self.preload_pages = preload_pages
+        self.poll_interval = poll_interval
         self.file = file
 
-        self.percentage_view = 0
+        self.placeholders = []
+        # page index -> (CTkImage, CTkLabel), least recently shown first
+        self.pdf_images = OrderedDict()
+        self._visible_job = None
+        self._drain_job = None
+
+        # rendering pipeline: the worker owns the fitz document and only talks to Tk through queues
+        self._generation = 0
+        self._cancelled = Event()
+        self._requests = None
+        self._results = queue.Queue()
+        self._pending = set()
+        self._wanted = frozenset()
+        self._awaiting_pages = False
+
         self.percentage_load = customtkinter.StringVar()
-        
         self.loading_message = customtkinter.CTkLabel(self, textvariable=self.percentage_load, justify="center")
-        self.loading_message.pack(pady=10)
 
-        self.loading_bar = customtkinter.CTkProgressBar(self, width=100)
-        self.loading_bar.set(0)
-        self.loading_bar.pack(side="top", fill="x", padx=10)
+        # re-check which pages are visible whenever the canvas scrolls or resizes
+        self._scrollbar_set = self._scrollbar.set
+        self._parent_canvas.configure(yscrollcommand=self._on_scroll)
+        self._parent_canvas.bind("<Configure>", self._on_canvas_configure, add=True)
 
-        self.after(250, self.start_process)
+        self.start_process()
 
     def start_process(self):
-        Thread(target=self.add_pages).start()
-        
-    def add_pages(self):
-        """ add images and labels """
-        self.percentage_bar = 0
-        open_pdf = fitz.open(self.file)
-        
-        for page in open_pdf:
-            page_data = page.get_pixmap()
-            pix = fitz.Pixmap(page_data, 0) if page_data.alpha else page_data
-            img = Image.open(io.BytesIO(pix.tobytes('ppm')))
-            label_img = customtkinter.CTkImage(img, size=(self.page_width, self.page_height))
-            self.pdf_images.append(label_img)
-                
-            self.percentage_bar = self.percentage_bar + 1
-            percentage_view = (float(self.percentage_bar) / float(len(open_pdf)) * float(100))
-            self.loading_bar.set(percentage_view)
-            self.percentage_load.set(f"Loading {os.path.basename(self.file)} \n{int(math.floor(percentage_view))}%")
-            
-        self.loading_bar.pack_forget()
+        """ start a worker for the current file; placeholders are laid out once it reports the page count """
+        self._generation += 1
+        self._cancelled = Event()
+        self._requests = queue.Queue()
+        self._pending = set()
+        self._wanted = frozenset()
+        self._awaiting_pages = True
+
+        if isinstance(self.file, (bytearray, memoryview)):
+            # the worker must not see the caller mutate the buffer
+            self.file = bytes(self.file)
+        self.percentage_load.set(f"Loading {self.file_name()}")
+        self.loading_message.pack(pady=10)
+
+        Thread(target=self._render_worker,
+               args=(self._generation, self.file, self._requests, self._cancelled),
+               daemon=True).start()
+        self._schedule_drain()
+
+    def _render_worker(self, generation, file, requests, cancelled):
+        """ producer: runs off the Tk thread and never touches widgets """
+        try:
+            document = self.open_document(file)
+        except Exception as e:
+            self._results.put(("error", generation, e))
+            return
+        try:
+            self._results.put(("pages", generation, len(document)))
+            while not cancelled.is_set():
+                request = requests.get()
+                if request is None or cancelled.is_set():
+                    break
+                index, width, height, scaling = request
+                if index not in self._wanted:
+                    # scrolled away before its turn came
+                    self._results.put(("skipped", generation, request))
+                    continue
+                img = self.render_page(document[index], width, height, scaling)
+                self._results.put(("page", generation, request, img))
+        except Exception as e:
+            self._results.put(("error", generation, e))
+        finally:
+            document.close()
+
+    @staticmethod
+    def open_document(file):
+        """ a path is read from disk; bytes are opened in memory through PyMuPDF's stream API """
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            return fitz.open(stream=bytes(file), filetype="pdf")
+        return fitz.open(file)
+
+    def file_name(self):
+        if isinstance(self.file, (bytes, bytearray, memoryview)):
+            return "PDF"
+        return os.path.basename(self.file)
+
+    @staticmethod
+    def render_page(page, width, height, scaling=1.0):
+        """ rasterize a page at the resolution it will be displayed, so no resampling is needed """
+        matrix = fitz.Matrix(width * scaling / page.rect.width, height * scaling / page.rect.height)
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    def _schedule_drain(self):
+        if self._drain_job is None:
+            self._drain_job = self.after(self.poll_interval, self._drain)
+
+    def _drain(self):
+        """ consumer: runs on the Tk thread and shows each page as soon as it arrives;
+        it only keeps polling while the page count or a requested page is outstanding """
+        self._drain_job = None
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            kind, generation = message[0], message[1]
+            if generation != self._generation:
+                # left over from a file that was replaced
+                continue
+            if kind == "pages":
+                self._awaiting_pages = False
+                self._add_placeholders(message[2])
+            elif kind == "page":
+                self._pending.discard(message[2])
+                self._show_rendered(message[2], message[3])
+            elif kind == "skipped":
+                self._pending.discard(message[2])
+            elif kind == "error":
+                self._awaiting_pages = False
+                self._pending.clear()
+                self.percentage_load.set(f"Could not open {self.file_name()}\n{message[2]}")
+                return
+        if not self._cancelled.is_set() and (self._awaiting_pages or self._pending):
+            self._schedule_drain()
+
+    def _add_placeholders(self, count):
         self.loading_message.pack_forget()
-        open_pdf.close()
-        
-        for i in self.pdf_images:
-            label = customtkinter.CTkLabel(self, image=i, text="")
-            label.pack(pady=(0, self.separation))
-            self.labels.append(label)
-        
+        for _ in range(count):
+            placeholder = customtkinter.CTkFrame(self, width=self.page_width, height=self.page_height, corner_radius=0)
+            placeholder.pack_propagate(False)
+            placeholder.pack(pady=(0, self.separation))
+            self.placeholders.append(placeholder)
+        self._schedule_visible()
+
+    def _show_rendered(self, request, img):
+        index, width, height, scaling = request
+        if (width, height, scaling) != (self.page_width, self.page_height, self._get_widget_scaling()):
+            # rendered for a size that has since changed
+            self._schedule_visible()
+            return
+        if index in self.pdf_images or index >= len(self.placeholders):
+            return
+        image = customtkinter.CTkImage(img, size=(self.page_width, self.page_height))
+        label = customtkinter.CTkLabel(self.placeholders[index], image=image, text="")
+        label.pack(expand=True, fill="both")
+        self.pdf_images[index] = (image, label)
+        self._evict()
+
+    def _evict(self):
+        while len(self.pdf_images) > max(self.cached_pages, len(self._wanted), 1):
+            _, (_, label) = self.pdf_images.popitem(last=False)
+            label.destroy()
+
+    def _on_scroll(self, first, last):
+        self._scrollbar_set(first, last)
+        self._schedule_visible()
+
+    def _on_canvas_configure(self, event=None):
+        self._schedule_visible()
+
+    def _schedule_visible(self):
+        if self._visible_job is None:
+            self._visible_job = self.after_idle(self.render_visible)
+
+    def visible_pages(self):
+        """ indices of the pages in the viewport, plus preload_pages on each side """
+        total = len(self.placeholders)
+        if total == 0:
+            return range(0)
+        first, last = self._parent_canvas.yview()
+        start = max(int(math.floor(first * total)) - self.preload_pages, 0)
+        end = min(int(math.ceil(last * total)) + self.preload_pages, total)
+        return range(start, end)
+
+    def render_visible(self):
+        """ queue the visible pages that are neither cached nor already requested """
+        self._visible_job = None
+        if self._requests is None:
+            return
+        visible = self.visible_pages()
+        self._wanted = frozenset(visible)
+        scaling = self._get_widget_scaling()
+        for index in visible:
+            if index in self.pdf_images:
+                self.pdf_images.move_to_end(index)
+                continue
+            request = (index, self.page_width, self.page_height, scaling)
+            if request not in self._pending:
+                self._pending.add(request)
+                self._requests.put(request)
+        if self._pending:
+            # polling stops when nothing is in flight; a new request restarts it
+            self._schedule_drain()
+
+    def clear_cache(self):
+        for _, label in self.pdf_images.values():
+            label.destroy()
+        self.pdf_images.clear()
+
+    def stop_process(self):
+        """ cancel the worker of the current file and drop its pages """
+        self._cancelled.set()
+        if self._requests is not None:
+            self._requests.put(None)
+            self._requests = None
+        if self._drain_job is not None:
+            self.after_cancel(self._drain_job)
+            self._drain_job = None
+        self.clear_cache()
+        for placeholder in self.placeholders:
+            placeholder.destroy()
+        self.placeholders = []
+
+    def destroy(self):
+        if self._visible_job is not None:
+            self.after_cancel(self._visible_job)
+            self._visible_job = None
+        self.stop_process()
+        super().destroy()
+
     def configure(self, **kwargs):
         """ configurable options """
-        
+
         if "file" in kwargs:
             self.file = kwargs.pop("file")
-            self.pdf_images = []
-            for i in self.labels:
-                i.destroy()
-            self.labels = []
-            self.after(250, self.start_process)
-            
+            self.stop_process()
+            self._parent_canvas.yview_moveto(0)
+            self.start_process()
+
+        resize = False
         if "page_width" in kwargs:
             self.page_width = kwargs.pop("page_width")
-            for i in self.pdf_images:
-                i.configure(size=(self.page_width, self.page_height))
-                
+            resize = True
+
         if "page_height" in kwargs:
             self.page_height = kwargs.pop("page_height")
-            for i in self.pdf_images:
-                i.configure(size=(self.page_width, self.page_height))
-            
+            resize = True
+
+        if resize:
+            # cached images were rasterized for the old size
+            self.clear_cache()
+            for placeholder in self.placeholders:
+                placeholder.configure(width=self.page_width, height=self.page_height)
+            self._schedule_visible()
+
         if "page_separation_height" in kwargs:
             self.separation = kwargs.pop("page_separation_height")
-            for i in self.labels:
-                i.pack_forget()
-                i.pack(pady=(0,self.separation))
-        
+            for placeholder in self.placeholders:
+                placeholder.pack_forget()
+                placeholder.pack(pady=(0, self.separation))
+            self._schedule_visible()
+
         super().configure(**kwargs)
@@ -1,14 +1,85 @@
 # database.py
-from sqlalchemy import create_engine
+import functools
+import os
+import random
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 # NOTA: Importamos los modelos aquí para que Base.metadata los conozca.
 # Ahora importamos 'models' aquí, antes de usarlo en create_db_and_tables,
 # pero ¡es mejor dejarlo en el archivo de inicialización si se usa el patrón
 # de ejecución de abajo!
 
-engine = create_engine("sqlite:///restaurante.db", echo=False)
+# RESTAURANTE_DB_URL permite apuntar varias cajas a la misma base (p. ej. en una carpeta compartida)
+DATABASE_URL = os.environ.get("RESTAURANTE_DB_URL", "sqlite:///restaurante.db")
+
+def crear_engine(url: str = DATABASE_URL, echo: bool = False, wal: bool = True,
+                 busy_timeout_ms: int = 5000, cache_kb: int = 16 * 1024, mmap_bytes: int = 64 * 1024 * 1024):
+    """Crea el engine; en SQLite configura cada conexión para varias cajas escribiendo a la vez.
+
+    - journal_mode=WAL: las lecturas no bloquean a quien escribe ni al revés.
+    - synchronous=NORMAL: con WAL sigue siendo consistente ante un corte y evita un fsync por commit.
+    - busy_timeout: SQLite espera el lock en vez de fallar de inmediato con "database is locked".
+    - cache_size / mmap_size: más páginas en memoria para las consultas del catálogo.
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url, echo=echo)
+
+    engine = create_engine(url, echo=echo, connect_args={"timeout": busy_timeout_ms / 1000})
+
+    @event.listens_for(engine, "connect")
+    def _configurar_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            # negativo = tamaño en KiB en vez de páginas
+            cursor.execute(f"PRAGMA cache_size=-{int(cache_kb)}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def es_bloqueo(error: OperationalError) -> bool:
+    mensaje = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in mensaje or "database is busy" in mensaje
+
+
+def con_reintentos(intentos: int = 5, espera_inicial: float = 0.05, espera_maxima: float = 1.0):
+    """Reintenta la transacción si SQLite sigue bloqueada después del busy_timeout.
+
+    Antes de cada reintento hace rollback de la sesión recibida como argumento
+    y espera con backoff exponencial acotado (con algo de azar para que las
+    cajas no reintenten todas al mismo tiempo). La función decorada debe poder
+    repetirse desde cero: cada intento vuelve a crear sus objetos.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            db = next((a for a in list(args) + list(kwargs.values()) if isinstance(a, Session)), None)
+            espera = espera_inicial
+            for intento in range(1, intentos + 1):
+                try:
+                    return funcion(*args, **kwargs)
+                except OperationalError as e:
+                    if db is not None:
+                        db.rollback()
+                    if intento == intentos or not es_bloqueo(e):
+                        raise
+                    time.sleep(espera * random.uniform(0.5, 1.0))
+                    espera = min(espera * 2, espera_maxima)
+        return envoltura
+    return decorador
+
+
+engine = crear_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # La clase Base debe definirse una sola vez y no en el bloque __main__
@@ -0,0 +1,185 @@
+# grilla_menus.py
+from typing import Callable, Dict, List, Optional
+import customtkinter as ctk
+from IMenu import IMenu
+from Stock import Stock
+
+
+class _Tarjeta:
+    __slots__ = ("marco", "texto_label", "porciones_label", "menu", "icono_path", "fila", "columna")
+
+    def __init__(self, marco, texto_label, porciones_label, menu: IMenu):
+        self.marco = marco
+        self.texto_label = texto_label
+        self.porciones_label = porciones_label
+        self.menu = menu
+        self.icono_path = getattr(menu, "icono_path", None)
+        self.fila = None
+        self.columna = None
+
+
+class GrillaMenus(ctk.CTkScrollableFrame):
+    """Rejilla de tarjetas de menú que solo tiene creadas las filas visibles.
+
+    sincronizar(menus) compara el catálogo con las tarjetas existentes por la
+    clave normalizada del nombre: crea las que faltan, actualiza las que
+    cambiaron y quita las que ya no se ven. Las filas fuera de la vista quedan
+    vacías pero con su alto reservado, así la barra de desplazamiento refleja
+    el catálogo completo y desplazarse cuesta lo mismo con 10 o 500 menús.
+    """
+
+    COLUMNAS = 4
+    # alto de una fila de tarjetas, con su margen (pady=15 arriba y abajo)
+    ALTO_FILA = 170
+    # filas extra que se crean arriba y abajo de la vista
+    FILAS_MARGEN = 1
+    # filas a crear mientras la rejilla aún no tiene tamaño en pantalla
+    FILAS_INICIALES = 3
+
+    def __init__(self, master, al_click: Callable, cargar_icono: Callable, texto_porciones: Callable[[IMenu], str],
+                 columnas: int = COLUMNAS, **kwargs):
+        super().__init__(master, **kwargs)
+        self.al_click = al_click
+        self.cargar_icono = cargar_icono
+        self.texto_porciones = texto_porciones
+        self.columnas = columnas
+
+        self._menus: List[IMenu] = []
+        self._claves: List[str] = []
+        self._tarjetas: Dict[str, _Tarjeta] = {}
+        self._filas_configuradas = 0
+        self._job = None
+
+        for columna in range(self.columnas):
+            self.grid_columnconfigure(columna, weight=1, uniform="tarjetas")
+
+        self._scrollbar_set = self._scrollbar.set
+        self._parent_canvas.configure(yscrollcommand=self._al_desplazar)
+        self._parent_canvas.bind("<Configure>", lambda event: self._programar(), add=True)
+
+    def sincronizar(self, menus: List[IMenu]) -> None:
+        self._menus = list(menus)
+        self._claves = [Stock.normalizar_nombre(m.nombre) for m in self._menus]
+
+        # reservar el alto de todas las filas, tengan o no tarjetas creadas
+        filas = -(-len(self._menus) // self.columnas)
+        alto = self._apply_widget_scaling(self.ALTO_FILA)
+        for fila in range(filas):
+            self.grid_rowconfigure(fila, minsize=alto)
+        for fila in range(filas, self._filas_configuradas):
+            self.grid_rowconfigure(fila, minsize=0)
+        self._filas_configuradas = filas
+
+        self._reconciliar()
+
+    def actualizar_porciones(self, porciones: Dict[str, Optional[int]]) -> None:
+        """Refresca el texto de porciones de las tarjetas creadas; las demás lo leen al crearse."""
+        for nombre in porciones:
+            tarjeta = self._tarjetas.get(Stock.normalizar_nombre(nombre))
+            if tarjeta is not None:
+                tarjeta.porciones_label.configure(text=self.texto_porciones(tarjeta.menu))
+
+    def _al_desplazar(self, primero, ultimo):
+        self._scrollbar_set(primero, ultimo)
+        self._programar()
+
+    def _programar(self):
+        if self._job is None:
+            self._job = self.after_idle(self._reconciliar)
+
+    def _filas_visibles(self) -> range:
+        filas = -(-len(self._menus) // self.columnas)
+        canvas = self._parent_canvas
+        alto_vista = canvas.winfo_height()
+        if alto_vista <= 1:
+            return range(min(self.FILAS_INICIALES, filas))
+        alto = self._apply_widget_scaling(self.ALTO_FILA)
+        arriba = canvas.canvasy(0)
+        primera = max(int(arriba // alto) - self.FILAS_MARGEN, 0)
+        ultima = min(int((arriba + alto_vista) // alto) + 1 + self.FILAS_MARGEN, filas)
+        return range(primera, ultima)
+
+    def _reconciliar(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+
+        filas = self._filas_visibles()
+        desde = filas.start * self.columnas
+        hasta = min(filas.stop * self.columnas, len(self._menus))
+        deseadas = {self._claves[i]: i for i in range(desde, hasta)}
+
+        for clave in [c for c in self._tarjetas if c not in deseadas]:
+            self._tarjetas.pop(clave).marco.destroy()
+
+        for clave, indice in deseadas.items():
+            menu = self._menus[indice]
+            tarjeta = self._tarjetas.get(clave)
+            if tarjeta is not None and tarjeta.icono_path != getattr(menu, "icono_path", None):
+                tarjeta.marco.destroy()
+                tarjeta = None
+            if tarjeta is None:
+                tarjeta = self._crear_tarjeta(menu)
+                self._tarjetas[clave] = tarjeta
+            else:
+                if tarjeta.texto_label.cget("text") != menu.nombre:
+                    tarjeta.texto_label.configure(text=menu.nombre)
+                tarjeta.menu = menu
+                texto = self.texto_porciones(menu)
+                if tarjeta.porciones_label.cget("text") != texto:
+                    tarjeta.porciones_label.configure(text=texto)
+
+            fila, columna = divmod(indice, self.columnas)
+            if (tarjeta.fila, tarjeta.columna) != (fila, columna):
+                tarjeta.marco.grid(row=fila, column=columna, padx=15, pady=15, sticky="nsew")
+                tarjeta.fila, tarjeta.columna = fila, columna
+
+    def _crear_tarjeta(self, menu: IMenu) -> _Tarjeta:
+        marco = ctk.CTkFrame(
+            self,
+            corner_radius=10,
+            border_width=1,
+            border_color="#4CAF50",
+            width=64,
+            height=140,
+            fg_color="gray",
+        )
+        marco.bind("<Enter>", lambda event: marco.configure(border_color="#FF0000"))
+        marco.bind("<Leave>", lambda event: marco.configure(border_color="#4CAF50"))
+
+        widgets = [marco]
+        if getattr(menu, "icono_path", None):
+            try:
+                icono = self.cargar_icono(menu.icono_path)
+                imagen_label = ctk.CTkLabel(
+                    marco, image=icono, width=64, height=64, text="", bg_color="transparent"
+                )
+                imagen_label.pack(anchor="center", pady=5, padx=10)
+                widgets.append(imagen_label)
+            except Exception as e:
+                print(f"No se pudo cargar la imagen '{menu.icono_path}': {e}")
+
+        texto_label = ctk.CTkLabel(
+            marco,
+            text=f"{menu.nombre}",
+            text_color="black",
+            font=("Helvetica", 12, "bold"),
+            bg_color="transparent",
+        )
+        texto_label.pack(anchor="center", pady=1)
+
+        porciones_label = ctk.CTkLabel(
+            marco,
+            text=self.texto_porciones(menu),
+            text_color="black",
+            font=("Helvetica", 11),
+            bg_color="transparent",
+        )
+        porciones_label.pack(anchor="center", pady=(0, 5))
+        widgets += [texto_label, porciones_label]
+
+        tarjeta = _Tarjeta(marco, texto_label, porciones_label, menu)
+        # el click lee tarjeta.menu, así sigue valiendo si el menú se actualiza en su lugar
+        for widget in widgets:
+            widget.bind("<Button-1>", lambda event, t=tarjeta: self.al_click(event, t.menu))
+        return tarjeta
@@ -1,12 +1,42 @@
 # menu_pdf.py
 from fpdf import FPDF
-from typing import List
+from typing import List, Union
 from IMenu import IMenu
+import hashlib
+import json
 import os
 
+# cambiar si se modifica el diseño de la carta, para invalidar lo ya generado
+_VERSION_DISENO = 1
+
+# ruta absoluta -> (hash de las entradas, (mtime, tamaño) del PDF escrito)
+_cache_cartas = {}
+
+# última carta generada en memoria: (hash de las entradas, bytes del PDF)
+_ultima_carta_bytes = None
+
 def _latin1(s: str) -> str:
     return s.encode("latin-1", "replace").decode("latin-1")
 
+def hash_carta(menus, titulo_negocio, subtitulo, moneda, colores) -> str:
+    """Hash estable de todo lo que influye en el contenido de la carta."""
+    datos = {
+        "version": _VERSION_DISENO,
+        "menus": [[str(m.nombre), float(m.precio)] for m in menus],
+        "titulo": titulo_negocio,
+        "subtitulo": subtitulo,
+        "moneda": moneda,
+        "colores": [list(c) for c in colores],
+    }
+    return hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _firma_archivo(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 def create_menu_pdf(
     menus: List[IMenu],
     pdf_path: str = "carta.pdf",
@@ -17,15 +47,33 @@ def create_menu_pdf(
     color_primario=(33, 150, 243),   
     color_header_text=(255, 255, 255),
     color_fila_par=(245, 247, 250),  
-    color_fila_impar=(255, 255, 255) 
-) -> str:
+    color_fila_impar=(255, 255, 255),
+    como_bytes: bool = False
+) -> Union[str, bytes]:
     """
     Genera un PDF de la carta solo con Nombre y Precio, con estilo:
     - Banner de título con color
     - Encabezado de tabla coloreado
     - Filas 'zebra'
     - Precios alineados a la derecha
+
+    Si las entradas no cambiaron desde la última vez y el archivo sigue igual
+    en disco, retorna la ruta sin volver a generar el PDF.
+
+    Con como_bytes=True no escribe pdf_path: retorna el PDF en memoria (el
+    mismo objeto mientras las entradas no cambien).
     """
+    global _ultima_carta_bytes
+    abs_path = os.path.abspath(pdf_path)
+    clave = hash_carta(menus, titulo_negocio, subtitulo, moneda,
+                       (color_primario, color_header_text, color_fila_par, color_fila_impar))
+    if como_bytes:
+        if _ultima_carta_bytes is not None and _ultima_carta_bytes[0] == clave:
+            return _ultima_carta_bytes[1]
+    else:
+        en_cache = _cache_cartas.get(abs_path)
+        if en_cache is not None and en_cache[0] == clave and en_cache[1] == _firma_archivo(abs_path):
+            return abs_path
 
     margen = 12
     col_w_nombre = 120
@@ -84,6 +132,11 @@ def create_menu_pdf(
     pdf.set_text_color(120, 120, 120)
     pdf.cell(0, 8, _latin1("Gracias por su preferencia."), align="C")
 
-    abs_path = os.path.abspath(pdf_path)
+    if como_bytes:
+        contenido = bytes(pdf.output())
+        _ultima_carta_bytes = (clave, contenido)
+        return contenido
+
     pdf.output(abs_path)
+    _cache_cartas[abs_path] = (clave, _firma_archivo(abs_path))
     return abs_path
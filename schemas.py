@@ -71,6 +71,12 @@ class PedidoBase(BaseModel):
 class PedidoCreate(PedidoBase):
     detalles: List[DetallePedidoCreate] = []  # si quieres incluir los menús dentro del pedido
 
+class PedidoUpdate(BaseModel):
+    total_neto: Optional[float] = None
+    total_iva: Optional[float] = None
+    total_final: Optional[float] = None
+    cliente_id: Optional[int] = None
+
 class Pedido(PedidoBase):
     id: int
     fecha: datetime
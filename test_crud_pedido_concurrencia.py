@@ -0,0 +1,73 @@
+# Varias cajas (procesos) creando pedidos a la vez sobre la misma base SQLite
+from multiprocessing import Pool
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud_detallepedido import DetallePedidoCRUD
+from crud.crud_pedido import create_pedido
+from database import Base, crear_engine
+from schemas import DetallePedidoCreate, PedidoCreate
+
+PROCESOS = 4
+PEDIDOS_POR_PROCESO = 100
+
+
+def _caja(url: str, caja: int, cantidad: int) -> int:
+    engine = crear_engine(url)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        for _ in range(cantidad):
+            create_pedido(db, PedidoCreate(
+                total_neto=1000.0, total_iva=190.0, total_final=1190.0,
+                detalles=[DetallePedidoCreate(nombre_menu=f"Caja {caja}", precio_unitario=1000.0, cantidad=1)],
+            ))
+        return cantidad
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _contar(engine):
+    with engine.connect() as conexion:
+        pedidos = conexion.execute(text("SELECT COUNT(*) FROM pedidos")).scalar()
+        detalles = conexion.execute(text("SELECT COUNT(*) FROM detalles_pedido")).scalar()
+        por_caja = dict(conexion.execute(text(
+            "SELECT nombre_menu, COUNT(*) FROM detalles_pedido GROUP BY nombre_menu")).all())
+    return pedidos, detalles, por_caja
+
+
+def test_varias_cajas_crean_pedidos_a_la_vez(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cajas.db'}"
+    engine = crear_engine(url)
+    Base.metadata.create_all(bind=engine)
+    try:
+        with Pool(PROCESOS) as pool:
+            creados = pool.starmap(_caja, [(url, caja, PEDIDOS_POR_PROCESO) for caja in range(PROCESOS)])
+        pedidos, detalles, por_caja = _contar(engine)
+    finally:
+        engine.dispose()
+
+    esperado = PROCESOS * PEDIDOS_POR_PROCESO
+    assert sum(creados) == esperado
+    assert pedidos == esperado
+    assert detalles == esperado
+    assert por_caja == {f"Caja {caja}": PEDIDOS_POR_PROCESO for caja in range(PROCESOS)}
+
+
+def test_detalles_de_un_pedido(tmp_path):
+    engine = crear_engine(f"sqlite:///{tmp_path / 'detalles.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        pedido = create_pedido(db, PedidoCreate(total_neto=2000.0, total_iva=380.0, total_final=2380.0))
+        crud = DetallePedidoCRUD()
+        creados = crud.create_detalles_for_pedido(db, pedido.id, [
+            {"nombre_menu": "Completo", "precio_unitario": 1000.0, "cantidad": 2},
+        ])
+        assert [d.id for d in crud.get_detalles_by_pedido_id(db, pedido.id)] == [d.id for d in creados]
+        assert crud.update_detalle_by_id(db, creados[0].id, 3).cantidad == 3
+        assert crud.delete_detalles_by_pedido_id(db, pedido.id) == 1
+    finally:
+        db.close()
+        engine.dispose()